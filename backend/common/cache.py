@@ -0,0 +1,41 @@
+"""
+Per-user values in Django's cache, invalidated by version. Each namespace
+keeps one version per user and caches the value together with the version
+it was built under, so a lookup is a single get_many() of both keys (one
+query on the database cache). Invalidating replaces the version when the
+transaction commits, so every process treats the stored value as stale.
+"""
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+
+
+def version_key(namespace, user_id):
+    return f'{namespace}:version:{user_id}'
+
+
+def value_key(namespace, user_id):
+    return f'{namespace}:{user_id}'
+
+
+def invalidate(namespace, user_id):
+    """Drop the user's cached value once the current transaction commits"""
+    transaction.on_commit(lambda: cache.set(version_key(namespace, user_id), time.time_ns(), None))
+
+
+def get_or_build(namespace, user_id, build, timeout):
+    """Return the user's cached value, calling build(user_id) to fill it on a miss"""
+    keys = [version_key(namespace, user_id), value_key(namespace, user_id)]
+    cached = cache.get_many(keys)
+    version = cached.get(keys[0])
+    stored = cached.get(keys[1])
+    if version is not None and stored is not None and stored[0] == version:
+        return stored[1]
+
+    if version is None:
+        version = time.time_ns()
+        cache.set(keys[0], version, None)
+    value = build(user_id)
+    cache.set(keys[1], (version, value), timeout)
+    return value
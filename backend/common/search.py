@@ -0,0 +1,50 @@
+"""
+Typo-tolerant matching of names, titles and descriptions by trigram word
+similarity, shared by the notes and projects apps. Word similarity compares
+the query with the best-matching stretch of the text rather than the whole
+value, so a misspelt word still matches inside a long description. On
+Postgres the pg_trgm <% operator lets the GIN gin_trgm_ops indexes serve the
+match.
+"""
+from django.contrib.postgres.lookups import TrigramWordSimilar
+from django.contrib.postgres.search import TrigramWordSimilarity
+from django.db import connection
+from django.db.models import Exists, F, FloatField, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest
+
+
+def fuzzy_search(queryset, text, fields, tags=None):
+    """
+    Filter queryset to rows whose fields (or, given the name of a many-to-many
+    to a model with a `name`, whose tag names) are similar to text, ordered by
+    `similarity`. Outside Postgres this is a plain icontains match.
+    """
+    if connection.vendor != 'postgresql':
+        match = Q()
+        for field in fields:
+            match |= Q(**{f'{field}__icontains': text})
+        if tags:
+            # The join through tags repeats rows matching several tags.
+            return queryset.filter(match | Q(**{f'{tags}__name__icontains': text})).distinct()
+        return queryset.filter(match)
+
+    # The <% operator (TrigramWordSimilar) is what lets Postgres use the trigram indexes.
+    match = Q()
+    scores = []
+    for field in fields:
+        match |= Q(TrigramWordSimilar(F(field), text))
+        scores.append(TrigramWordSimilarity(text, field))
+
+    if tags:
+        relation = queryset.model._meta.get_field(tags)
+        matching_tags = relation.related_model.objects.filter(
+            TrigramWordSimilar(F('name'), text), **{relation.related_query_name(): OuterRef('pk')}
+        )
+        match |= Q(Exists(matching_tags))
+        best_tag = matching_tags.annotate(
+            similarity=TrigramWordSimilarity(text, 'name')
+        ).order_by('-similarity').values('similarity')[:1]
+        scores.append(Coalesce(Subquery(best_tag), Value(0.0), output_field=FloatField()))
+
+    similarity = Greatest(*scores) if len(scores) > 1 else scores[0]
+    return queryset.filter(match).annotate(similarity=similarity).order_by('-similarity')
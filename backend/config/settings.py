@@ -105,6 +105,19 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/6.0/topics/cache/
+# Must be shared by all worker processes (not LocMem), so invalidating a cached
+# entry in one reaches the others. Production should set CACHE_URL to Redis,
+# e.g. redis://localhost:6379/1. Without it, a table in the main database is
+# used (python manage.py createcachetable); a cached lookup then costs one
+# query and a miss a few more.
+
+CACHES = {
+    'default': env.cache('CACHE_URL', default='dbcache://django_cache')
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
 
@@ -195,3 +208,7 @@ CSRF_TRUSTED_ORIGINS = [
     "http://127.0.0.1:5177",
     "http://127.0.0.1:5178",
 ]
+
+# Habit reminders: dotted path of the sink dispatch_reminders delivers to
+HABIT_REMINDER_SINK = env('HABIT_REMINDER_SINK', default='habits.reminders.LogSink')
+HABIT_REMINDER_FILE = env('HABIT_REMINDER_FILE', default=str(BASE_DIR / 'habit_reminders.jsonl'))
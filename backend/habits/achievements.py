@@ -0,0 +1,82 @@
+"""
+Data-driven achievement evaluation. An achievement is earned once the user
+has completed a habit, their best current streak reaches streak_required
+and they track at least habit_count_required habits; points_required is
+credited when it unlocks. Definitions are cached per process, and each
+evaluation reads one snapshot of the user's state.
+"""
+import time
+
+from django.db import transaction
+
+from .models import Achievement, Habit, PointsEvent, UserAchievement
+from .points import credit_points
+
+DEFINITIONS_TTL = 300
+
+_definitions = None
+_definitions_loaded_at = 0
+
+
+def get_definitions():
+    global _definitions, _definitions_loaded_at
+    if _definitions is None or time.monotonic() - _definitions_loaded_at > DEFINITIONS_TTL:
+        _definitions = list(Achievement.objects.all())
+        _definitions_loaded_at = time.monotonic()
+    return _definitions
+
+
+def clear_definitions():
+    global _definitions
+    _definitions = None
+
+
+class UserSnapshot:
+    def __init__(self, user_id):
+        habits = list(Habit.objects.filter(user_id=user_id).only(
+            'frequency', 'target_days', 'created_at',
+            'current_streak', 'last_completed_date'
+        ))
+        self.habit_count = len(habits)
+        self.has_completed = any(habit.last_completed_date for habit in habits)
+        self.best_streak = max((habit.current_streak_on() for habit in habits), default=0)
+        self.unlocked = set(
+            UserAchievement.objects.filter(user_id=user_id).values_list('achievement_id', flat=True)
+        )
+
+    def meets(self, achievement):
+        return (
+            self.has_completed
+            and self.best_streak >= achievement.streak_required
+            and self.habit_count >= achievement.habit_count_required
+        )
+
+
+def evaluate_achievements(user_id):
+    """Unlock every achievement the user now qualifies for; returns the new ones"""
+    definitions = get_definitions()
+    if not definitions:
+        return []
+
+    snapshot = UserSnapshot(user_id)
+    earned = [
+        achievement for achievement in definitions
+        if achievement.id not in snapshot.unlocked and snapshot.meets(achievement)
+    ]
+    if not earned:
+        return []
+
+    with transaction.atomic():
+        reward = 0
+        for achievement in earned:
+            _, created = UserAchievement.objects.get_or_create(user_id=user_id, achievement=achievement)
+            if created:
+                reward += achievement.points_required
+        if reward > 0:
+            credit_points(user_id, reward, PointsEvent.ACHIEVEMENT)
+    return earned
+
+
+def schedule_evaluation(user_id):
+    """Evaluate achievements once the current transaction commits"""
+    transaction.on_commit(lambda: evaluate_achievements(user_id))
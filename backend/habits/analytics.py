@@ -0,0 +1,92 @@
+from datetime import date, timedelta
+
+from .bitmaps import decode, due_mask, span_mask, weekday_mask
+from .models import HabitYearBitmap
+from .stats import due_weekdays
+
+DAY_NAMES = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+
+
+def load_window(habits, start, end):
+    """
+    Build a habits x days completion matrix for start..end from a single
+    bitmap query: one integer per habit, bit n being day start + n.
+    """
+    matrix = {habit.id: 0 for habit in habits}
+    rows = HabitYearBitmap.objects.filter(
+        habit__in=list(matrix), year__gte=start.year, year__lte=end.year
+    ).values_list('habit_id', 'year', 'bits')
+
+    days = (end - start).days + 1
+    for habit_id, year, bits in rows:
+        shift = (date(year, 1, 1) - start).days
+        value = decode(bits)
+        value = value << shift if shift >= 0 else value >> -shift
+        matrix[habit_id] |= value & span_mask(0, days - 1)
+    return matrix
+
+
+def build_analytics(habits, today=None, days=28, weeks=4):
+    """Completion analytics over the last `days` days and `weeks` weeks"""
+    today = today or date.today()
+    span = max(days, weeks * 7)
+    start = today - timedelta(days=span - 1)
+
+    habits = list(habits)
+    matrix = load_window(habits, start, today)
+    due = {habit.id: due_mask(start, span, due_weekdays(habit)) for habit in habits}
+
+    def index(day):
+        return (day - start).days
+
+    recent = span_mask(index(today - timedelta(days=days - 1)), index(today))
+    total_due = 0
+    total_completed = 0
+    day_counts = [0] * 7
+    for habit in habits:
+        due_bits = due[habit.id] & recent
+        done_bits = matrix[habit.id] & due_bits
+        total_due += due_bits.bit_count()
+        total_completed += done_bits.bit_count()
+        for weekday in range(7):
+            day_counts[weekday] += (done_bits & weekday_mask(start, span, weekday)).bit_count()
+
+    overall_rate = (total_completed / total_due * 100) if total_due > 0 else 0
+
+    # Ties go to the weekday closest to today, as before.
+    recent_weekdays = [(today - timedelta(days=offset)).weekday() for offset in range(7)]
+    best_day = max(recent_weekdays, key=lambda weekday: (day_counts[weekday], -recent_weekdays.index(weekday)))
+    if not any(day_counts):
+        best_day = 0
+
+    habits_data = [
+        {'id': habit.id, 'name': habit.name, 'completion_rate': habit.completion_rate_on(today)}
+        for habit in habits
+    ]
+    most_consistent = max(habits_data, key=lambda x: x['completion_rate']) if habits_data else None
+
+    weekly_summary = []
+    for week in range(weeks):
+        week_end = today - timedelta(weeks=week)
+        week_bits = span_mask(index(week_end - timedelta(days=6)), index(week_end))
+        completed = 0
+        total = 0
+        for habit in habits:
+            due_bits = due[habit.id] & week_bits
+            total += due_bits.bit_count()
+            completed += (matrix[habit.id] & due_bits).bit_count()
+
+        weekly_summary.append({
+            'week': f'Week {weeks - week}',
+            'completed': completed,
+            'total': total
+        })
+
+    weekly_summary.reverse()
+
+    return {
+        'overall_completion_rate': round(overall_rate, 1),
+        'best_day_of_week': DAY_NAMES[best_day],
+        'most_consistent_habit': most_consistent,
+        'weekly_summary': weekly_summary
+    }
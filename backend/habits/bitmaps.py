@@ -0,0 +1,111 @@
+"""
+Compact completion history: one bitset per habit per year, where bit n is
+set when the habit was completed on day n of that year (January 1st = bit 0).
+"""
+import base64
+from functools import lru_cache
+
+from .models import HabitYearBitmap
+
+YEAR_BYTES = 46  # 366 bits
+
+
+def day_index(day):
+    return day.timetuple().tm_yday - 1
+
+
+def decode(bits):
+    return int.from_bytes(bytes(bits or b''), 'little')
+
+
+def encode(value):
+    return value.to_bytes(YEAR_BYTES, 'little')
+
+
+@lru_cache(maxsize=None)
+def weekday_mask(start, days, weekday):
+    """Bits set for every day in the span of `days` days from start that falls on weekday"""
+    offset = (weekday - start.weekday()) % 7
+    mask = 0
+    for index in range(offset, days, 7):
+        mask |= 1 << index
+    return mask
+
+
+def due_mask(start, days, weekdays):
+    mask = 0
+    for weekday in weekdays:
+        mask |= weekday_mask(start, days, weekday)
+    return mask
+
+
+def span_mask(first, last):
+    """Bits first..last inclusive"""
+    if last < first:
+        return 0
+    return ((1 << (last - first + 1)) - 1) << first
+
+
+def set_day(habit, day, completed):
+    """Set or clear the bit for day in the habit's bitmap for that year"""
+    bitmap, _ = HabitYearBitmap.objects.select_for_update().get_or_create(
+        habit=habit, year=day.year, defaults={'bits': encode(0)}
+    )
+    value = decode(bitmap.bits)
+    if completed:
+        value |= 1 << day_index(day)
+    else:
+        value &= ~(1 << day_index(day))
+    bitmap.bits = encode(value)
+    bitmap.save(update_fields=['bits', 'updated_at'])
+
+
+def set_days(changes):
+    """Apply many (habit_id, day, completed) changes with one read and one upsert"""
+    if not changes:
+        return
+
+    habit_ids = {habit_id for habit_id, _, _ in changes}
+    years = {day.year for _, day, _ in changes}
+    values = {
+        (habit_id, year): decode(bits)
+        for habit_id, year, bits in HabitYearBitmap.objects.select_for_update().filter(
+            habit_id__in=habit_ids, year__in=years
+        ).values_list('habit_id', 'year', 'bits')
+    }
+    for habit_id, day, completed in changes:
+        key = (habit_id, day.year)
+        value = values.get(key, 0)
+        if completed:
+            value |= 1 << day_index(day)
+        else:
+            value &= ~(1 << day_index(day))
+        values[key] = value
+
+    HabitYearBitmap.objects.bulk_create(
+        [HabitYearBitmap(habit_id=habit_id, year=year, bits=encode(value))
+         for (habit_id, year), value in values.items()],
+        update_conflicts=True,
+        unique_fields=['habit', 'year'],
+        update_fields=['bits', 'updated_at']
+    )
+
+
+def to_base64(value, days):
+    """Encode a window bitset as little-endian base64 (bit n = day n of the window)"""
+    return base64.b64encode(value.to_bytes((days + 7) // 8, 'little')).decode('ascii')
+
+
+def to_runs(value):
+    """Encode a window bitset as [offset, length] runs of completed days"""
+    runs = []
+    offset = 0
+    while value:
+        skip = (value & -value).bit_length() - 1
+        value >>= skip
+        offset += skip
+        length = (~value & (value + 1)).bit_length() - 1
+        runs.append([offset, length])
+        value >>= length
+        offset += length
+    return runs
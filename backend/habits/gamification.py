@@ -0,0 +1,33 @@
+"""
+Per-user gamification snapshot (points, level, title, progress and unlocked
+achievement ids), cached until the user's UserStats or UserAchievement rows
+change.
+"""
+from common import cache
+
+from .models import UserAchievement, UserStats
+
+SNAPSHOT_NAMESPACE = 'habits:gamification'
+SNAPSHOT_TIMEOUT = 60 * 60
+
+
+def invalidate(user_id):
+    """Drop the user's snapshot once the current transaction commits"""
+    cache.invalidate(SNAPSHOT_NAMESPACE, user_id)
+
+
+def build_snapshot(user_id):
+    user_stats, _ = UserStats.objects.get_or_create(user_id=user_id)
+    return {
+        'points': user_stats.total_points,
+        'level': user_stats.level,
+        'title': user_stats.title,
+        'progress': round(user_stats.get_progress_to_next_level(), 1),
+        'unlocked_ids': set(
+            UserAchievement.objects.filter(user_id=user_id).values_list('achievement_id', flat=True)
+        ),
+    }
+
+
+def get_snapshot(user_id):
+    return cache.get_or_build(SNAPSHOT_NAMESPACE, user_id, build_snapshot, SNAPSHOT_TIMEOUT)
@@ -0,0 +1,109 @@
+"""
+Cross-habit insights computed in batch: pairwise co-completion correlations
+and weekday failure rates over a trailing window. Each habit's window is one
+integer bitset, so every pair costs a few ANDs and popcounts instead of a
+scan over habits x days.
+"""
+from datetime import date, timedelta
+from itertools import combinations
+from math import sqrt
+
+from .analytics import DAY_NAMES, load_window
+from .bitmaps import due_mask, span_mask, weekday_mask
+from .models import Habit, HabitInsights
+from .stats import due_weekdays
+
+INSIGHT_DAYS = 90
+MIN_SHARED_DAYS = 14
+MAX_CORRELATIONS = 25
+
+
+def phi(shared, first, second, both):
+    """Phi coefficient of two completion bitsets over `shared` days both were due"""
+    denominator = first * (shared - first) * second * (shared - second)
+    if not denominator:
+        return None
+    return (shared * both - first * second) / sqrt(denominator)
+
+
+def failure_rate(due, missed):
+    return round(missed / due * 100, 1) if due else None
+
+
+def compute_insights(user_id, end=None, days=INSIGHT_DAYS):
+    """Build (unsaved) insights for the `days` days ending on end"""
+    end = end or date.today() - timedelta(days=1)
+    start = end - timedelta(days=days - 1)
+    habits = list(Habit.objects.filter(user_id=user_id).order_by('id'))
+    matrix = load_window(habits, start, end)
+
+    due = {}
+    for habit in habits:
+        before_created = (habit.created_at.date() - start).days - 1
+        due[habit.id] = due_mask(start, days, due_weekdays(habit)) & ~span_mask(0, before_created)
+
+    correlations = []
+    for first, second in combinations(habits, 2):
+        shared_days = due[first.id] & due[second.id]
+        shared = shared_days.bit_count()
+        if shared < MIN_SHARED_DAYS:
+            continue
+        first_done = matrix[first.id] & shared_days
+        second_done = matrix[second.id] & shared_days
+        both = (first_done & second_done).bit_count()
+        coefficient = phi(shared, first_done.bit_count(), second_done.bit_count(), both)
+        if coefficient is None:
+            continue
+        correlations.append({
+            'habit_a': {'id': first.id, 'name': first.name},
+            'habit_b': {'id': second.id, 'name': second.name},
+            'shared_days': shared,
+            'completed_together': both,
+            'correlation': round(coefficient, 3)
+        })
+    correlations.sort(key=lambda pair: -abs(pair['correlation']))
+
+    weekday_totals = [[0, 0] for _ in range(7)]
+    habit_failure_rates = []
+    for habit in habits:
+        rates = []
+        for weekday in range(7):
+            due_bits = due[habit.id] & weekday_mask(start, days, weekday)
+            due_count = due_bits.bit_count()
+            missed = (due_bits & ~matrix[habit.id]).bit_count()
+            weekday_totals[weekday][0] += due_count
+            weekday_totals[weekday][1] += missed
+            rates.append(failure_rate(due_count, missed))
+        known = [(rate, weekday) for weekday, rate in enumerate(rates) if rate is not None]
+        habit_failure_rates.append({
+            'habit_id': habit.id,
+            'name': habit.name,
+            'failure_rates': rates,
+            'worst_day': DAY_NAMES[max(known)[1]] if known and max(known)[0] > 0 else None
+        })
+
+    weekday_failure_rates = [
+        {'day': DAY_NAMES[weekday], 'due': due_count, 'missed': missed,
+         'failure_rate': failure_rate(due_count, missed)}
+        for weekday, (due_count, missed) in enumerate(weekday_totals)
+    ]
+
+    return HabitInsights(
+        user_id=user_id,
+        window_start=start,
+        window_end=end,
+        correlations=correlations[:MAX_CORRELATIONS],
+        weekday_failure_rates=weekday_failure_rates,
+        habit_failure_rates=habit_failure_rates
+    )
+
+
+def store_insights(rows):
+    """Insert or replace the insights rows, one per user"""
+    HabitInsights.objects.bulk_create(
+        rows,
+        update_conflicts=True,
+        unique_fields=['user'],
+        update_fields=['window_start', 'window_end', 'correlations', 'weekday_failure_rates',
+                       'habit_failure_rates', 'computed_at']
+    )
@@ -0,0 +1,30 @@
+from datetime import date, timedelta
+
+from django.db.models import Min
+from django.core.management.base import BaseCommand
+
+from habits.models import Habit
+from habits.rollups import rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the daily habit rollups of every user from their habit history'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=int, help='Only rebuild rollups for this user id')
+        parser.add_argument('--days', type=int, help='Only rebuild the trailing number of days (e.g. 2 nightly)')
+
+    def handle(self, *args, **options):
+        today = date.today()
+        users = Habit.objects.values('user_id').annotate(first_day=Min('created_at')).order_by('user_id')
+        if options['user']:
+            users = users.filter(user_id=options['user'])
+
+        total = 0
+        for row in users:
+            start = row['first_day'].date()
+            if options['days']:
+                start = max(start, today - timedelta(days=options['days'] - 1))
+            total += rebuild_rollups(row['user_id'], start, today)
+
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {total} daily rollups'))
@@ -0,0 +1,39 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Sum
+from django.utils import timezone
+
+from habits.models import PointsEvent
+
+
+class Command(BaseCommand):
+    help = 'Fold ledger events older than the retention window into one snapshot per user and habit'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=90, help='Keep individual events newer than this')
+        parser.add_argument('--batch-size', type=int, default=200, help='Users compacted per transaction')
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options['days'])
+        old_events = PointsEvent.objects.filter(created_at__lt=cutoff)
+        user_ids = list(old_events.order_by('user_id').values_list('user_id', flat=True).distinct())
+
+        folded = 0
+        for i in range(0, len(user_ids), options['batch_size']):
+            batch = user_ids[i:i + options['batch_size']]
+            with transaction.atomic():
+                events = old_events.filter(user_id__in=batch)
+                totals = events.values('user_id', 'habit_id').annotate(points=Sum('points')).order_by()
+                snapshots = [
+                    PointsEvent(user_id=row['user_id'], habit_id=row['habit_id'], points=row['points'],
+                                reason=PointsEvent.SNAPSHOT)
+                    for row in totals if row['points']
+                ]
+                folded += events.delete()[0]
+                created = PointsEvent.objects.bulk_create(snapshots)
+                # Snapshots keep the cutoff as their timestamp so they sort before live events.
+                PointsEvent.objects.filter(id__in=[event.id for event in created]).update(created_at=cutoff)
+
+        self.stdout.write(self.style.SUCCESS(f'Folded {folded} ledger events for {len(user_ids)} users'))
@@ -0,0 +1,29 @@
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand
+
+from habits.insights import INSIGHT_DAYS, compute_insights, store_insights
+from habits.models import Habit
+
+
+class Command(BaseCommand):
+    help = 'Compute cross-habit correlations and weekday failure rates for every user (run nightly)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=INSIGHT_DAYS, help='Length of the trailing window')
+        parser.add_argument('--batch-size', type=int, default=200, help='Users stored per write')
+
+    def handle(self, *args, **options):
+        # Today is still in progress, so the window ends yesterday.
+        end = date.today() - timedelta(days=1)
+        user_ids = list(Habit.objects.order_by('user_id').values_list('user_id', flat=True).distinct())
+
+        batch = []
+        for user_id in user_ids:
+            batch.append(compute_insights(user_id, end, options['days']))
+            if len(batch) >= options['batch_size']:
+                store_insights(batch)
+                batch = []
+        store_insights(batch)
+
+        self.stdout.write(self.style.SUCCESS(f'Computed insights for {len(user_ids)} users'))
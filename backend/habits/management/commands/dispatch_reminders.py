@@ -0,0 +1,43 @@
+import time
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from habits.reminders import dispatch, get_sink, minutes_between
+
+
+class Command(BaseCommand):
+    help = 'Send habit reminders for each minute bucket as it comes due'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Dispatch the current minute and exit')
+        parser.add_argument('--at', help='Dispatch the given HH:MM minute of today and exit')
+
+    def handle(self, *args, **options):
+        sink = get_sink()
+        now = timezone.localtime().replace(tzinfo=None, second=0, microsecond=0)
+
+        if options['at']:
+            try:
+                moment = datetime.combine(now.date(), datetime.strptime(options['at'], '%H:%M').time())
+            except ValueError:
+                raise CommandError('--at must be in HH:MM format')
+            self.report(moment, dispatch(moment, sink))
+            return
+
+        self.report(now, dispatch(now, sink))
+        if options['once']:
+            return
+
+        last = now
+        while True:
+            time.sleep(60 - timezone.localtime().second)
+            now = timezone.localtime().replace(tzinfo=None)
+            # Catch up on every bucket since the last pass, e.g. after a slow sink.
+            for moment in minutes_between(last, now):
+                self.report(moment, dispatch(moment, sink))
+                last = moment
+
+    def report(self, moment, sent):
+        self.stdout.write(self.style.SUCCESS(f'{moment:%Y-%m-%d %H:%M}: sent {sent} reminders'))
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from habits.achievements import evaluate_achievements
+from habits.models import Habit
+
+
+class Command(BaseCommand):
+    help = 'Evaluate achievements for every user with habits (e.g. after changing achievement definitions)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=int, help='Only evaluate this user id')
+
+    def handle(self, *args, **options):
+        user_ids = Habit.objects.order_by('user_id').values_list('user_id', flat=True).distinct()
+        if options['user']:
+            user_ids = user_ids.filter(user_id=options['user'])
+
+        unlocked = 0
+        for user_id in user_ids:
+            unlocked += len(evaluate_achievements(user_id))
+
+        self.stdout.write(self.style.SUCCESS(f'Unlocked {unlocked} achievements'))
@@ -0,0 +1,97 @@
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import django
+from django.core.management.base import BaseCommand
+from django.db import connections, transaction
+
+from habits.models import Habit
+from habits.services import COUNTER_FIELDS
+from habits.stats import load_completed_dates, refresh_streak_counters
+
+STAT_FIELDS = COUNTER_FIELDS + ['due_mask']
+
+
+def init_worker():
+    # Forked workers must not reuse the parent's sockets; spawned ones need Django set up.
+    django.setup()
+    connections.close_all()
+
+
+def rebuild_users(user_ids):
+    """Rebuild the stored counters of every habit owned by user_ids; returns the habit count"""
+    with transaction.atomic():
+        # Locked like toggle_habit_log locks them, and the logs are read under the lock,
+        # so a check-in either commits before this read or waits for the write.
+        habits = list(Habit.objects.select_for_update().filter(user_id__in=user_ids).order_by('pk'))
+        completed_dates = load_completed_dates(habits)
+        for habit in habits:
+            refresh_streak_counters(habit, completed_dates.get(habit.id, set()))
+            habit.due_mask = habit.get_due_mask()
+        Habit.objects.bulk_update(habits, STAT_FIELDS, batch_size=1000)
+    return len(habits)
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the stored streak counters of every habit from its log history, optionally in parallel'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=200, help='Users rebuilt per transaction')
+        parser.add_argument('--workers', type=int, default=1, help='Worker processes; 1 runs in this process')
+        parser.add_argument('--checkpoint', help='File recording progress, resumed from if it exists')
+
+    def handle(self, *args, **options):
+        checkpoint = options['checkpoint']
+        done_through = self.read_checkpoint(checkpoint)
+
+        user_ids = list(
+            Habit.objects.filter(user_id__gt=done_through)
+            .order_by('user_id').values_list('user_id', flat=True).distinct()
+        )
+        size = options['batch_size']
+        chunks = [user_ids[i:i + size] for i in range(0, len(user_ids), size)]
+        if done_through:
+            self.stdout.write(f'Resuming after user {done_through}')
+
+        pending = set(range(len(chunks)))
+        users_done = 0
+        habits_done = 0
+
+        def finished(index, habit_count):
+            nonlocal users_done, habits_done
+            pending.discard(index)
+            users_done += len(chunks[index])
+            habits_done += habit_count
+            # Only advance past chunks that have all finished, so a resume never skips one.
+            first_pending = min(pending, default=len(chunks))
+            if first_pending > 0:
+                self.write_checkpoint(checkpoint, chunks[first_pending - 1][-1])
+            self.stdout.write(f'{users_done}/{len(user_ids)} users, {habits_done} habits')
+
+        if options['workers'] <= 1:
+            for index, chunk in enumerate(chunks):
+                finished(index, rebuild_users(chunk))
+        else:
+            connections.close_all()
+            with ProcessPoolExecutor(max_workers=options['workers'], initializer=init_worker) as pool:
+                futures = {pool.submit(rebuild_users, chunk): index for index, chunk in enumerate(chunks)}
+                for future in as_completed(futures):
+                    finished(futures[future], future.result())
+
+        if checkpoint and os.path.exists(checkpoint):
+            os.remove(checkpoint)
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt streak counters for {habits_done} habits'))
+
+    def read_checkpoint(self, path):
+        if not path or not os.path.exists(path):
+            return 0
+        with open(path, encoding='utf-8') as handle:
+            return json.load(handle)['done_through_user']
+
+    def write_checkpoint(self, path, user_id):
+        if not path:
+            return
+        with open(f'{path}.tmp', 'w', encoding='utf-8') as handle:
+            json.dump({'done_through_user': user_id}, handle)
+        os.replace(f'{path}.tmp', path)
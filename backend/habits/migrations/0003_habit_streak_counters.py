@@ -0,0 +1,103 @@
+# Generated by Django 5.2.18 on 2026-10-17 23:59
+
+from datetime import timedelta
+
+from django.db import migrations, models
+
+BATCH_SIZE = 500
+
+
+# Frozen copies of the rules in habits.models/habits.stats as of this migration.
+def due_weekdays(habit):
+    if habit.frequency == 'weekdays':
+        return frozenset(range(5))
+    if habit.frequency == 'weekends':
+        return frozenset((5, 6))
+    if habit.frequency == 'custom':
+        return frozenset(habit.target_days or [])
+    return frozenset(range(7))
+
+
+def counters(habit, dates):
+    start_date = habit.created_at.date()
+    weekdays = due_weekdays(habit)
+    if not dates:
+        return 0, 0, None, 0
+
+    def previous_due(day):
+        day -= timedelta(days=1)
+        while day >= start_date and day.weekday() not in weekdays:
+            day -= timedelta(days=1)
+        return day
+
+    last = max(dates)
+    day = last if last.weekday() in weekdays else previous_due(last)
+    current = 0
+    while day >= start_date and day in dates:
+        current += 1
+        day = previous_due(day)
+
+    longest = run = 0
+    prev_date = None
+    for log_date in sorted(dates):
+        if log_date < start_date:
+            continue
+        run = run + 1 if prev_date is not None and (log_date - prev_date).days == 1 else 1
+        longest = max(longest, run)
+        prev_date = log_date
+
+    completed = sum(1 for log_date in dates if log_date >= start_date and log_date.weekday() in weekdays)
+    return current, longest, last, completed
+
+
+def fill_counters(apps, schema_editor):
+    Habit = apps.get_model('habits', 'Habit')
+    HabitLog = apps.get_model('habits', 'HabitLog')
+    fields = ['current_streak', 'longest_streak', 'last_completed_date', 'completed_count']
+
+    habits = Habit.objects.only('id', 'frequency', 'target_days', 'created_at').order_by('id')
+    last_id = 0
+    while True:
+        batch = list(habits.filter(id__gt=last_id)[:BATCH_SIZE])
+        if not batch:
+            break
+        dates = {}
+        for habit_id, day in HabitLog.objects.filter(habit__in=batch, completed=True).values_list('habit_id', 'date'):
+            dates.setdefault(habit_id, set()).add(day)
+        for habit in batch:
+            values = counters(habit, dates.get(habit.id, set()))
+            for field, value in zip(fields, values):
+                setattr(habit, field, value)
+        Habit.objects.bulk_update(batch, fields)
+        last_id = batch[-1].id
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('habits', '0002_achievement_habit_category_habit_color_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='habit',
+            name='completed_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='habit',
+            name='current_streak',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='habit',
+            name='last_completed_date',
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='habit',
+            name='longest_streak',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-18 00:01
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('habits', '0003_habit_streak_counters'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HabitYearBitmap',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('year', models.SmallIntegerField()),
+                ('bits', models.BinaryField(max_length=46)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('habit', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='bitmaps', to='habits.habit')),
+            ],
+            options={
+                'ordering': ['year'],
+                'unique_together': {('habit', 'year')},
+            },
+        ),
+    ]
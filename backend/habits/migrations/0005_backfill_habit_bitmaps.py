@@ -0,0 +1,64 @@
+from django.db import migrations
+
+BATCH_SIZE = 1000
+YEAR_BYTES = 46  # 366 bits
+
+
+# Frozen copies of the habits.bitmaps encoding as of this migration.
+def encode(value):
+    return value.to_bytes(YEAR_BYTES, 'little')
+
+
+def dates_to_bits(dates):
+    """Group dates into {year: int bitset}, bit n being day n of the year"""
+    years = {}
+    for day in dates:
+        years[day.year] = years.get(day.year, 0) | (1 << (day.timetuple().tm_yday - 1))
+    return years
+
+
+def backfill_bitmaps(apps, schema_editor):
+    HabitLog = apps.get_model('habits', 'HabitLog')
+    HabitYearBitmap = apps.get_model('habits', 'HabitYearBitmap')
+
+    def flush(habit_id, dates, pending):
+        for year, value in dates_to_bits(dates).items():
+            pending.append(HabitYearBitmap(habit_id=habit_id, year=year, bits=encode(value)))
+        if len(pending) >= BATCH_SIZE:
+            HabitYearBitmap.objects.bulk_create(pending)
+            pending.clear()
+
+    rows = (
+        HabitLog.objects.filter(completed=True)
+        .order_by('habit_id', 'date')
+        .values_list('habit_id', 'date')
+        .iterator(chunk_size=BATCH_SIZE)
+    )
+    pending = []
+    current_habit = None
+    dates = []
+    for habit_id, day in rows:
+        if habit_id != current_habit:
+            if current_habit is not None:
+                flush(current_habit, dates, pending)
+            current_habit = habit_id
+            dates = []
+        dates.append(day)
+    if current_habit is not None:
+        flush(current_habit, dates, pending)
+    HabitYearBitmap.objects.bulk_create(pending)
+
+
+def clear_bitmaps(apps, schema_editor):
+    apps.get_model('habits', 'HabitYearBitmap').objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('habits', '0004_habityearbitmap'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_bitmaps, clear_bitmaps),
+    ]
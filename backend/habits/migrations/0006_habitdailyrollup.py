@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-18 00:03
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('habits', '0005_backfill_habit_bitmaps'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HabitDailyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('due_count', models.IntegerField(default=0)),
+                ('completed_count', models.IntegerField(default=0)),
+                ('category_counts', models.JSONField(default=dict)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='habit_rollups', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['date'],
+                'unique_together': {('user', 'date')},
+            },
+        ),
+    ]
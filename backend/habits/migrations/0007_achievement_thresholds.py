@@ -0,0 +1,26 @@
+from django.db import migrations
+
+# Thresholds for the achievements that used to be hard-coded by name in
+# habits/signals.py; they are now evaluated from the model fields.
+LEGACY_THRESHOLDS = {
+    'Week Warrior': {'streak_required': 7},
+    'Month Master': {'streak_required': 30},
+    'Diverse': {'habit_count_required': 5},
+}
+
+
+def set_thresholds(apps, schema_editor):
+    Achievement = apps.get_model('habits', 'Achievement')
+    for name, thresholds in LEGACY_THRESHOLDS.items():
+        Achievement.objects.filter(name=name, streak_required=0, habit_count_required=0).update(**thresholds)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('habits', '0006_habitdailyrollup'),
+    ]
+
+    operations = [
+        migrations.RunPython(set_thresholds, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-18 00:05
+
+from django.db import migrations, models
+
+FREQUENCY_MASKS = {'daily': 0b1111111, 'weekdays': 0b0011111, 'weekends': 0b1100000}
+
+
+def populate_due_mask(apps, schema_editor):
+    Habit = apps.get_model('habits', 'Habit')
+    habits = list(Habit.objects.exclude(frequency='daily').only('frequency', 'target_days'))
+    for habit in habits:
+        if habit.frequency == 'custom':
+            habit.due_mask = sum(1 << weekday for weekday in range(7) if weekday in (habit.target_days or []))
+        else:
+            habit.due_mask = FREQUENCY_MASKS.get(habit.frequency, 0b1111111)
+    Habit.objects.bulk_update(habits, ['due_mask'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('habits', '0007_achievement_thresholds'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='habit',
+            name='due_mask',
+            field=models.SmallIntegerField(default=127),
+        ),
+        migrations.RunPython(populate_due_mask, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-18 00:07
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('habits', '0008_habit_due_mask'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PointsEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('points', models.IntegerField()),
+                ('reason', models.CharField(choices=[('habit_completed', 'Habit Completed'), ('achievement', 'Achievement'), ('snapshot', 'Snapshot')], max_length=20)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('habit', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='points_events', to='habits.habit')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='points_events', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['user', 'created_at'], name='habits_poin_user_id_7c6b42_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,33 @@
+from django.db import migrations
+
+
+def seed_ledger(apps, schema_editor):
+    """
+    Open the ledger with one snapshot per habit for its points and one per
+    user for their total, so each running total equals its events' sum.
+    Totals, levels and titles are not changed.
+    """
+    Habit = apps.get_model('habits', 'Habit')
+    UserStats = apps.get_model('habits', 'UserStats')
+    PointsEvent = apps.get_model('habits', 'PointsEvent')
+
+    events = [
+        PointsEvent(user_id=user_id, habit_id=habit_id, points=points, reason='snapshot')
+        for habit_id, user_id, points in Habit.objects.exclude(points=0).values_list('id', 'user_id', 'points')
+    ]
+    events += [
+        PointsEvent(user_id=user_id, habit_id=None, points=points, reason='snapshot')
+        for user_id, points in UserStats.objects.exclude(total_points=0).values_list('user_id', 'total_points')
+    ]
+    PointsEvent.objects.bulk_create(events, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('habits', '0009_pointsevent'),
+    ]
+
+    operations = [
+        migrations.RunPython(seed_ledger, migrations.RunPython.noop),
+    ]
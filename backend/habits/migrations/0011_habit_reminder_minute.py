@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-18 00:08
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def populate_reminder_minute(apps, schema_editor):
+    Habit = apps.get_model('habits', 'Habit')
+    habits = list(Habit.objects.filter(reminder_time__isnull=False).only('reminder_time'))
+    for habit in habits:
+        habit.reminder_minute = habit.reminder_time.hour * 60 + habit.reminder_time.minute
+    Habit.objects.bulk_update(habits, ['reminder_minute'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('habits', '0010_seed_points_ledger'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='habit',
+            name='reminder_minute',
+            field=models.SmallIntegerField(blank=True, null=True),
+        ),
+        migrations.RunPython(populate_reminder_minute, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='habit',
+            index=models.Index(condition=models.Q(('reminder_enabled', True)), fields=['reminder_minute', 'due_mask'], name='habit_reminder_bucket_idx'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-18 00:11
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('habits', '0011_habit_reminder_minute'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HabitInsights',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('window_start', models.DateField()),
+                ('window_end', models.DateField()),
+                ('correlations', models.JSONField(default=list)),
+                ('weekday_failure_rates', models.JSONField(default=list)),
+                ('habit_failure_rates', models.JSONField(default=list)),
+                ('computed_at', models.DateTimeField(auto_now=True)),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='habit_insights', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+    ]
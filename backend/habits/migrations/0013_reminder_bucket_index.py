@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 00:32
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('habits', '0012_habitinsights'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='habit',
+            name='habit_reminder_bucket_idx',
+        ),
+        migrations.AddIndex(
+            model_name='habit',
+            index=models.Index(condition=models.Q(('reminder_enabled', True)), fields=['reminder_minute'], name='habit_reminder_bucket_idx'),
+        ),
+    ]
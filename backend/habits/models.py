@@ -28,16 +28,47 @@ class Habit(models.Model):
     category = models.CharField(max_length=20, choices=CATEGORY_CHOICES, default='other')
     reminder_time = models.TimeField(null=True, blank=True)
     reminder_enabled = models.BooleanField(default=False)
+    reminder_minute = models.SmallIntegerField(null=True, blank=True)
+    due_mask = models.SmallIntegerField(default=0b1111111)
     points = models.IntegerField(default=0)
+    current_streak = models.IntegerField(default=0)
+    longest_streak = models.IntegerField(default=0)
+    last_completed_date = models.DateField(null=True, blank=True)
+    completed_count = models.IntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
         ordering = ['-created_at']
         unique_together = ['user', 'name']
+        indexes = [
+            models.Index(
+                fields=['reminder_minute'],
+                condition=models.Q(reminder_enabled=True),
+                name='habit_reminder_bucket_idx',
+            ),
+        ]
 
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        self.due_mask = self.get_due_mask()
+        self.reminder_minute = self.reminder_time.hour * 60 + self.reminder_time.minute if self.reminder_time else None
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            update_fields = set(update_fields)
+            if {'frequency', 'target_days'} & update_fields:
+                update_fields.add('due_mask')
+            if 'reminder_time' in update_fields:
+                update_fields.add('reminder_minute')
+            kwargs['update_fields'] = update_fields
+        super().save(*args, **kwargs)
+
+    def get_due_mask(self):
+        """7-bit weekday mask, bit 0 = Monday, derived from frequency/target_days"""
+        monday = date(2024, 1, 1)
+        return sum(1 << weekday for weekday in range(7) if self.is_due_on(monday + timedelta(days=weekday)))
+
     def is_due_today(self):
         """Check if habit is due today based on frequency"""
         today = date.today()
@@ -53,37 +84,6 @@ class Habit(models.Model):
             return weekday in (self.target_days or [])
         return True
 
-    def get_completion_rate(self):
-        """Calculate completion rate based on frequency"""
-        from datetime import datetime, timedelta
-        logs = self.logs.filter(completed=True)
-        if not logs.exists():
-            return 0
-
-        start_date = self.created_at.date()
-        today = date.today()
-        total_days = (today - start_date).days + 1
-
-        if total_days <= 0:
-            return 0
-
-        if self.frequency == 'daily':
-            completed = logs.count()
-        else:
-            due_days = 0
-            current = start_date
-            while current <= today:
-                if self.is_due_on(current):
-                    due_days += 1
-                current += timedelta(days=1)
-
-            completed = logs.filter(date__gte=start_date, date__lte=today).count()
-            if due_days == 0:
-                return 0
-            return (completed / due_days) * 100
-
-        return (completed / total_days) * 100 if total_days > 0 else 0
-
     def is_due_on(self, check_date):
         """Check if a specific date is a due day"""
         weekday = check_date.weekday()
@@ -97,57 +97,33 @@ class Habit(models.Model):
             return weekday in (self.target_days or [])
         return True
 
-    def get_current_streak(self):
-        """Count consecutive completed days ending today (respects frequency)"""
-        logs = self.logs.filter(completed=True).order_by('-date')
-        if not logs.exists():
-            return 0
-
-        streak = 0
-        current_date = date.today()
+    def get_completed_dates(self):
+        return set(self.logs.filter(completed=True).values_list('date', flat=True))
 
-        if not self.is_due_on(current_date):
-            current_date -= timedelta(days=1)
-            while current_date >= self.created_at.date() and not self.is_due_on(current_date):
-                current_date -= timedelta(days=1)
+    def get_completion_rate(self):
+        """Calculate completion rate based on frequency"""
+        from .stats import completion_rate
+        return completion_rate(self, self.get_completed_dates())
 
-        if current_date < self.created_at.date():
-            return 0
+    def get_current_streak(self):
+        """Count consecutive completed days ending today (respects frequency)"""
+        from .stats import current_streak
+        return current_streak(self, self.get_completed_dates())
 
-        while logs.filter(date=current_date, completed=True).exists():
-            streak += 1
-            current_date -= timedelta(days=1)
-            while current_date >= self.created_at.date() and not self.is_due_on(current_date):
-                current_date -= timedelta(days=1)
-            if current_date < self.created_at.date():
-                break
+    def get_longest_streak(self):
+        """Find max run of consecutive completed days"""
+        from .stats import longest_streak
+        return longest_streak(self, self.get_completed_dates())
 
-        return streak
+    def current_streak_on(self, day=None):
+        """Current streak read from the stored counters"""
+        from .stats import current_streak_from_counters
+        return current_streak_from_counters(self, day)
 
-    def get_longest_streak(self):
-        """Find max run of consecutive completed days (respects frequency)"""
-        logs = self.logs.filter(completed=True).order_by('date')
-        if not logs.exists():
-            return 0
-
-        longest = 0
-        current = 0
-        prev_date = None
-        start_date = self.created_at.date()
-
-        for log in logs:
-            if log.date < start_date:
-                continue
-            if prev_date is None:
-                current = 1
-            elif (log.date - prev_date).days == 1:
-                current += 1
-            else:
-                current = 1
-            longest = max(longest, current)
-            prev_date = log.date
-
-        return longest
+    def completion_rate_on(self, day=None):
+        """Completion rate read from the stored counters"""
+        from .stats import completion_rate_from_counters
+        return completion_rate_from_counters(self, day)
 
 
 class HabitLog(models.Model):
@@ -163,6 +139,51 @@ class HabitLog(models.Model):
         return f"{self.habit.name} - {self.date}"
 
 
+class HabitYearBitmap(models.Model):
+    """One year of a habit's completions packed into a bitset (see habits.bitmaps)"""
+    habit = models.ForeignKey(Habit, on_delete=models.CASCADE, related_name='bitmaps')
+    year = models.SmallIntegerField()
+    bits = models.BinaryField(max_length=46)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ['habit', 'year']
+        ordering = ['year']
+
+    def __str__(self):
+        return f"{self.habit.name} - {self.year}"
+
+
+class HabitDailyRollup(models.Model):
+    """Per-user daily totals of due and completed habits (see habits.rollups)"""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='habit_rollups')
+    date = models.DateField()
+    due_count = models.IntegerField(default=0)
+    completed_count = models.IntegerField(default=0)
+    category_counts = models.JSONField(default=dict)
+
+    class Meta:
+        unique_together = ['user', 'date']
+        ordering = ['date']
+
+    def __str__(self):
+        return f"{self.user.username} - {self.date}"
+
+
+class HabitInsights(models.Model):
+    """Nightly cross-habit insights for one user (see habits.insights)"""
+    user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='habit_insights')
+    window_start = models.DateField()
+    window_end = models.DateField()
+    correlations = models.JSONField(default=list)
+    weekday_failure_rates = models.JSONField(default=list)
+    habit_failure_rates = models.JSONField(default=list)
+    computed_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.user.username} - {self.window_end}"
+
+
 class Achievement(models.Model):
     name = models.CharField(max_length=100, unique=True)
     description = models.TextField()
@@ -186,11 +207,12 @@ class UserAchievement(models.Model):
 
 
 class UserStats(models.Model):
+    # (level, points threshold, title), lowest first
     LEVELS = [
-        ('Beginner', 0),
-        ('Consistent', 100),
-        ('Dedicated', 300),
-        ('Master', 600),
+        ('Beginner', 0, 'Newcomer'),
+        ('Consistent', 100, 'Consistent Starter'),
+        ('Dedicated', 300, 'Dedicated Achiever'),
+        ('Master', 600, 'Habit Master'),
     ]
 
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='stats')
@@ -199,34 +221,19 @@ class UserStats(models.Model):
     title = models.CharField(max_length=50, default='Newcomer')
 
     def add_points(self, points):
-        self.total_points += points
-        self.update_level()
-        self.save()
-
-    def update_level(self):
-        if self.total_points >= 600:
-            self.level = 'Master'
-            self.title = 'Habit Master'
-        elif self.total_points >= 300:
-            self.level = 'Dedicated'
-            self.title = 'Dedicated Achiever'
-        elif self.total_points >= 100:
-            self.level = 'Consistent'
-            self.title = 'Consistent Starter'
-        else:
-            self.level = 'Beginner'
-            self.title = 'Newcomer'
+        from .points import credit_points
+        credit_points(self.user_id, points, PointsEvent.ACHIEVEMENT)
+        self.refresh_from_db(fields=['total_points', 'level', 'title'])
 
     def get_progress_to_next_level(self):
-        thresholds = [0, 100, 300, 600]
         current_threshold = 0
         next_threshold = 100
 
-        for i, (level, threshold) in enumerate(self.LEVELS):
+        for i, (level, threshold, title) in enumerate(self.LEVELS):
             if self.total_points >= threshold:
                 current_threshold = threshold
                 if i + 1 < len(self.LEVELS):
-                    next_threshold = thresholds[i + 1]
+                    next_threshold = self.LEVELS[i + 1][1]
                 else:
                     next_threshold = threshold + 100
 
@@ -237,3 +244,32 @@ class UserStats(models.Model):
 
     def __str__(self):
         return f"{self.user.username} - {self.level}"
+
+
+class PointsEvent(models.Model):
+    """
+    Append-only ledger of point changes. Habit.points is the running total of
+    a habit's events and UserStats.total_points that of the user's events
+    with no habit.
+    """
+    HABIT_COMPLETED = 'habit_completed'
+    ACHIEVEMENT = 'achievement'
+    SNAPSHOT = 'snapshot'
+    REASON_CHOICES = [
+        (HABIT_COMPLETED, 'Habit Completed'),
+        (ACHIEVEMENT, 'Achievement'),
+        (SNAPSHOT, 'Snapshot'),
+    ]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='points_events')
+    habit = models.ForeignKey(Habit, on_delete=models.SET_NULL, null=True, blank=True, related_name='points_events')
+    points = models.IntegerField()
+    reason = models.CharField(max_length=20, choices=REASON_CHOICES)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [models.Index(fields=['user', 'created_at'])]
+
+    def __str__(self):
+        return f"{self.user.username} {self.points:+d} ({self.reason})"
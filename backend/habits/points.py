@@ -0,0 +1,68 @@
+"""
+Points are recorded as PointsEvent rows and applied with F() updates, so
+concurrent check-ins never read-modify-write a row. Events for a habit
+(check-ins) add to Habit.points; events without one (achievement rewards)
+add to UserStats.total_points, whose level is recalculated in the same
+UPDATE.
+"""
+from django.db import transaction
+from django.db.models import Case, F, Value, When
+
+from . import gamification
+from .models import Habit, PointsEvent, UserStats
+
+def level_expressions(delta=0):
+    """Case expressions for level and title once delta is added to total_points"""
+    lowest, *ranked = UserStats.LEVELS
+
+    def case(position):
+        return Case(
+            *[When(total_points__gte=row[1] - delta, then=Value(row[position])) for row in reversed(ranked)],
+            default=Value(lowest[position])
+        )
+    return {'level': case(0), 'title': case(2)}
+
+
+def apply_to_user(user_id, delta):
+    # Queryset updates skip the post_save signal, so drop the cached snapshot here.
+    gamification.invalidate(user_id)
+    updated = UserStats.objects.filter(user_id=user_id).update(
+        total_points=F('total_points') + delta, **level_expressions(delta)
+    )
+    if not updated:
+        UserStats.objects.get_or_create(user_id=user_id)
+        UserStats.objects.filter(user_id=user_id).update(
+            total_points=F('total_points') + delta, **level_expressions(delta)
+        )
+
+
+def credit_points(user_id, points, reason, habit_id=None):
+    """Record one ledger event and apply it to the habit and user totals"""
+    credit_many(user_id, [(habit_id, points, reason)])
+
+
+def credit_many(user_id, events):
+    """Record many (habit_id, points, reason) events with one insert and at most one update per table"""
+    events = [(habit_id, points, reason) for habit_id, points, reason in events if points]
+    if not events:
+        return
+
+    with transaction.atomic():
+        PointsEvent.objects.bulk_create([
+            PointsEvent(user_id=user_id, habit_id=habit_id, points=points, reason=reason)
+            for habit_id, points, reason in events
+        ])
+
+        per_habit = {}
+        for habit_id, points, _ in events:
+            if habit_id is not None:
+                per_habit[habit_id] = per_habit.get(habit_id, 0) + points
+        if per_habit:
+            Habit.objects.filter(id__in=per_habit).update(points=F('points') + Case(
+                *[When(id=habit_id, then=Value(amount)) for habit_id, amount in per_habit.items()],
+                default=Value(0)
+            ))
+
+        user_points = sum(points for habit_id, points, _ in events if habit_id is None)
+        if user_points:
+            apply_to_user(user_id, user_points)
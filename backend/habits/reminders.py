@@ -0,0 +1,98 @@
+"""
+Habit reminders, bucketed by minute of day. Each dispatch reads the habits
+whose reminder falls in one minute and that are due and not yet completed
+that day with a single indexed query, and streams them to a pluggable sink
+in chunks.
+"""
+import json
+import logging
+from datetime import timedelta
+from itertools import islice
+
+from django.conf import settings
+from django.db.models import Exists, F, OuterRef
+from django.utils.module_loading import import_string
+
+from .models import Habit, HabitLog
+
+logger = logging.getLogger(__name__)
+
+DISPATCH_CHUNK = 500
+
+
+class LogSink:
+    """Write each reminder to the habits.reminders logger"""
+
+    def send(self, reminders):
+        for reminder in reminders:
+            logger.info('Reminder for user %s: %s', reminder['user_id'], reminder['name'])
+
+
+class FileSink:
+    """Append reminders to a JSON lines file"""
+
+    def __init__(self, path=None):
+        self.path = path or settings.HABIT_REMINDER_FILE
+
+    def send(self, reminders):
+        if not reminders:
+            return
+        with open(self.path, 'a', encoding='utf-8') as handle:
+            for reminder in reminders:
+                handle.write(json.dumps(reminder, default=str) + '\n')
+
+
+def get_sink():
+    return import_string(settings.HABIT_REMINDER_SINK)()
+
+
+def minute_of_day(moment):
+    return moment.hour * 60 + moment.minute
+
+
+def due_reminders(day, minute):
+    """Habits with a reminder at minute that are due on day and not yet completed"""
+    completed_logs = HabitLog.objects.filter(habit=OuterRef('pk'), date=day, completed=True)
+    return (
+        Habit.objects
+        .filter(reminder_enabled=True, reminder_minute=minute)
+        .annotate(due_bit=F('due_mask').bitand(1 << day.weekday()))
+        .filter(due_bit__gt=0)
+        .filter(~Exists(completed_logs))
+        .order_by('id')
+        .values('id', 'user_id', 'name', 'icon', 'reminder_time')
+    )
+
+
+def dispatch(moment, sink=None):
+    """Send the reminders for the minute containing moment; returns how many were sent"""
+    sink = sink or get_sink()
+    day = moment.date()
+    reminders = (
+        {
+            'habit_id': row['id'],
+            'user_id': row['user_id'],
+            'name': row['name'],
+            'icon': row['icon'],
+            'reminder_time': row['reminder_time'],
+            'date': day,
+        }
+        for row in due_reminders(day, minute_of_day(moment)).iterator(chunk_size=DISPATCH_CHUNK)
+    )
+
+    sent = 0
+    while True:
+        batch = list(islice(reminders, DISPATCH_CHUNK))
+        if not batch:
+            break
+        sink.send(batch)
+        sent += len(batch)
+    return sent
+
+
+def minutes_between(last, now):
+    """The minute starts after last up to and including now, so a slow pass never skips a bucket"""
+    moment = last.replace(second=0, microsecond=0) + timedelta(minutes=1)
+    while moment <= now:
+        yield moment
+        moment += timedelta(minutes=1)
@@ -0,0 +1,214 @@
+"""
+Per-user daily rollups of due and completed habits. Rows are kept up to
+date by toggle_habit_log and stored for the rest of history by the
+backfill_habit_rollups command; reads compute any day not stored yet in
+memory. Long-range analytics read one row per day instead of scanning logs.
+"""
+from collections import defaultdict
+from datetime import date, timedelta
+
+from django.db import transaction
+from django.db.models import Max
+
+from .analytics import DAY_NAMES, load_window
+from .bitmaps import due_mask, span_mask
+from .models import Habit, HabitDailyRollup
+from .stats import due_weekdays
+
+ROLLUP_FIELDS = ['due_count', 'completed_count', 'category_counts']
+CHUNK_DAYS = 366
+
+
+def compute_rollups(user_id, start, end):
+    """Build unsaved rollup rows for start..end from the user's habits and bitmaps"""
+    habits = list(Habit.objects.filter(user_id=user_id))
+    days = (end - start).days + 1
+    matrix = load_window(habits, start, end)
+
+    due_masks = {}
+    for habit in habits:
+        before_created = (habit.created_at.date() - start).days - 1
+        due_masks[habit.id] = due_mask(start, days, due_weekdays(habit)) & ~span_mask(0, before_created)
+
+    rows = []
+    for offset in range(days):
+        bit = 1 << offset
+        rollup = HabitDailyRollup(user_id=user_id, date=start + timedelta(days=offset), category_counts={})
+        for habit in habits:
+            if not due_masks[habit.id] & bit:
+                continue
+            counts = rollup.category_counts.setdefault(habit.category, {'due': 0, 'completed': 0})
+            rollup.due_count += 1
+            counts['due'] += 1
+            if matrix[habit.id] & bit:
+                rollup.completed_count += 1
+                counts['completed'] += 1
+        rows.append(rollup)
+    return rows
+
+
+def refresh_day(user_id, day):
+    """Recompute and store the rollup for one day"""
+    rollup = compute_rollups(user_id, day, day)[0]
+    HabitDailyRollup.objects.update_or_create(
+        user_id=user_id, date=day,
+        defaults={field: getattr(rollup, field) for field in ROLLUP_FIELDS}
+    )
+
+
+def record_change(habit, day, completed):
+    """Apply a completed/un-completed log on a due day to the user's rollup"""
+    if day < habit.created_at.date() or not habit.is_due_on(day):
+        return
+
+    with transaction.atomic():
+        rollup = HabitDailyRollup.objects.select_for_update().filter(user_id=habit.user_id, date=day).first()
+        if rollup is None:
+            # Built from the current logs, which already include this change.
+            refresh_day(habit.user_id, day)
+            return
+
+        delta = 1 if completed else -1
+        counts = rollup.category_counts.setdefault(habit.category, {'due': 0, 'completed': 0})
+        counts['completed'] += delta
+        rollup.completed_count += delta
+        rollup.save(update_fields=['completed_count', 'category_counts'])
+
+
+def record_changes(user_id, changes):
+    """Apply many (habit, day, completed) changes to the user's rollups in one pass"""
+    changes = [
+        (habit, day, completed) for habit, day, completed in changes
+        if day >= habit.created_at.date() and habit.is_due_on(day)
+    ]
+    if not changes:
+        return
+
+    days = {day for _, day, _ in changes}
+    with transaction.atomic():
+        existing = {rollup.date: rollup for rollup in HabitDailyRollup.objects.select_for_update().filter(
+            user_id=user_id, date__in=days
+        )}
+        for habit, day, completed in changes:
+            rollup = existing.get(day)
+            if rollup is None:
+                continue
+            delta = 1 if completed else -1
+            counts = rollup.category_counts.setdefault(habit.category, {'due': 0, 'completed': 0})
+            counts['completed'] += delta
+            rollup.completed_count += delta
+        HabitDailyRollup.objects.bulk_update(existing.values(), ['completed_count', 'category_counts'])
+
+        missing = sorted(days - set(existing))
+        if missing:
+            # Built from the current logs, which already include these changes.
+            fresh = [
+                rollup for rollup in compute_rollups(user_id, missing[0], missing[-1])
+                if rollup.date in set(missing)
+            ]
+            HabitDailyRollup.objects.bulk_create(fresh, ignore_conflicts=True)
+
+
+def rebuild_rollups(user_id, start, end):
+    """Replace the stored rollups for start..end with freshly computed ones, a year at a time"""
+    total = 0
+    while start <= end:
+        chunk_end = min(end, start + timedelta(days=CHUNK_DAYS - 1))
+        with transaction.atomic():
+            # Locked before computing, so a concurrent record_change lands on the new rows.
+            stored = HabitDailyRollup.objects.filter(user_id=user_id, date__gte=start, date__lte=chunk_end)
+            list(stored.select_for_update().values_list('id', flat=True))
+            fresh = compute_rollups(user_id, start, chunk_end)
+            stored.delete()
+            HabitDailyRollup.objects.bulk_create(fresh, ignore_conflicts=True)
+        total += len(fresh)
+        start = chunk_end + timedelta(days=1)
+    return total
+
+
+def refresh_since(user_id, start):
+    """Recompute every stored rollup from start on, after a habit's schedule or category changed or it was deleted"""
+    last = HabitDailyRollup.objects.filter(user_id=user_id).aggregate(last=Max('date'))['last']
+    rebuild_rollups(user_id, start, max(date.today(), last or start))
+
+
+def load_rollups(user_id, start, end):
+    """Return one rollup per day in start..end; days not stored yet are computed in memory, not saved"""
+    rows = {rollup.date: rollup for rollup in HabitDailyRollup.objects.filter(
+        user_id=user_id, date__gte=start, date__lte=end
+    )}
+
+    last_day = min(end, date.today())
+    missing = [
+        start + timedelta(days=offset)
+        for offset in range((last_day - start).days + 1)
+        if start + timedelta(days=offset) not in rows
+    ]
+    if missing:
+        rows.update(
+            (rollup.date, rollup) for rollup in compute_rollups(user_id, missing[0], missing[-1])
+            if rollup.date not in rows
+        )
+
+    return [rows[day] for day in sorted(rows)]
+
+
+def build_range_analytics(user, habits, start, end):
+    """Completion analytics for an arbitrary date range, read from the daily rollups"""
+    rollups = load_rollups(user.id, start, end)
+
+    total_due = sum(rollup.due_count for rollup in rollups)
+    total_completed = sum(rollup.completed_count for rollup in rollups)
+    overall_rate = (total_completed / total_due * 100) if total_due > 0 else 0
+
+    day_counts = [0] * 7
+    categories = defaultdict(lambda: {'due': 0, 'completed': 0})
+    for rollup in rollups:
+        day_counts[rollup.date.weekday()] += rollup.completed_count
+        for category, counts in rollup.category_counts.items():
+            categories[category]['due'] += counts['due']
+            categories[category]['completed'] += counts['completed']
+    best_day = day_counts.index(max(day_counts))
+
+    habits_data = [
+        {'id': habit.id, 'name': habit.name, 'completion_rate': habit.completion_rate_on()}
+        for habit in habits
+    ]
+    most_consistent = max(habits_data, key=lambda x: x['completion_rate']) if habits_data else None
+
+    weeks = defaultdict(lambda: {'completed': 0, 'total': 0})
+    for rollup in rollups:
+        week = weeks[(end - rollup.date).days // 7]
+        week['completed'] += rollup.completed_count
+        week['total'] += rollup.due_count
+
+    week_count = (end - start).days // 7 + 1
+    weekly_summary = []
+    for number, week in enumerate(range(week_count - 1, -1, -1), start=1):
+        week_end = end - timedelta(weeks=week)
+        weekly_summary.append({
+            'week': f'Week {number}',
+            'week_start': max(start, week_end - timedelta(days=6)),
+            'completed': weeks[week]['completed'],
+            'total': weeks[week]['total']
+        })
+
+    category_summary = [
+        {
+            'category': category,
+            'completed': counts['completed'],
+            'total': counts['due'],
+            'completion_rate': round(counts['completed'] / counts['due'] * 100, 1) if counts['due'] else 0
+        }
+        for category, counts in sorted(categories.items())
+    ]
+
+    return {
+        'start': start,
+        'end': end,
+        'overall_completion_rate': round(overall_rate, 1),
+        'best_day_of_week': DAY_NAMES[best_day] if total_completed else 'N/A',
+        'most_consistent_habit': most_consistent,
+        'weekly_summary': weekly_summary,
+        'category_summary': category_summary
+    }
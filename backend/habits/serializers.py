@@ -1,7 +1,7 @@
 from rest_framework import serializers
 from datetime import date, timedelta
 from django.db.models import Count
-from .models import Habit, HabitLog, Achievement, UserAchievement, UserStats
+from .models import Habit, HabitLog, HabitInsights, Achievement, UserAchievement, UserStats
 
 
 class HabitLogSerializer(serializers.ModelSerializer):
@@ -11,6 +11,16 @@ class HabitLogSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'habit']
 
 
+class HabitLogEntrySerializer(serializers.Serializer):
+    habit = serializers.IntegerField()
+    date = serializers.DateField()
+    completed = serializers.BooleanField(default=True)
+
+
+class HabitLogBulkSerializer(serializers.Serializer):
+    entries = HabitLogEntrySerializer(many=True, allow_empty=False, max_length=1000)
+
+
 class HabitSerializer(serializers.ModelSerializer):
     current_streak = serializers.SerializerMethodField()
     longest_streak = serializers.SerializerMethodField()
@@ -27,16 +37,18 @@ class HabitSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'created_at', 'points']
 
     def get_current_streak(self, obj):
-        return obj.get_current_streak()
+        return obj.current_streak_on()
 
     def get_longest_streak(self, obj):
-        return obj.get_longest_streak()
+        return obj.longest_streak
 
     def get_today_completed(self, obj):
+        if hasattr(obj, 'today_completed'):
+            return obj.today_completed
         return obj.logs.filter(date=date.today(), completed=True).exists()
 
     def get_completion_rate(self, obj):
-        return round(obj.get_completion_rate(), 1)
+        return round(obj.completion_rate_on(), 1)
 
 
 class HabitCreateSerializer(serializers.ModelSerializer):
@@ -56,6 +68,8 @@ class AchievementSerializer(serializers.ModelSerializer):
         fields = ['id', 'name', 'description', 'icon', 'unlocked']
 
     def get_unlocked(self, obj):
+        if 'unlocked_ids' in self.context:
+            return obj.id in self.context['unlocked_ids']
         user = self.context.get('request').user if self.context.get('request') else None
         if user:
             return UserAchievement.objects.filter(user=user, achievement=obj).exists()
@@ -91,3 +105,10 @@ class AnalyticsSerializer(serializers.Serializer):
     best_day_of_week = serializers.CharField()
     most_consistent_habit = serializers.DictField()
     weekly_summary = serializers.ListField()
+
+
+class HabitInsightsSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = HabitInsights
+        fields = ['window_start', 'window_end', 'correlations', 'weekday_failure_rates',
+                  'habit_failure_rates', 'computed_at']
@@ -0,0 +1,103 @@
+from django.db import transaction
+
+from . import bitmaps, rollups
+from .achievements import schedule_evaluation
+from .models import Habit, HabitLog, PointsEvent
+from .points import credit_many, credit_points
+from .stats import apply_log_change, load_completed_dates, refresh_streak_counters
+
+COMPLETION_POINTS = 10
+COUNTER_FIELDS = ['current_streak', 'longest_streak', 'last_completed_date', 'completed_count']
+
+
+def toggle_habit_log(habit, day, completed):
+    """Create or update the log for day, keeping the habit's stored counters in sync"""
+    with transaction.atomic():
+        habit = Habit.objects.select_for_update().get(pk=habit.pk)
+        was_completed = HabitLog.objects.filter(habit=habit, date=day, completed=True).exists()
+
+        log, created = HabitLog.objects.update_or_create(
+            habit=habit,
+            date=day,
+            defaults={'completed': completed}
+        )
+
+        bitmaps.set_day(habit, day, completed)
+
+        apply_log_change(habit, day, bool(completed), was_completed)
+        habit.save(update_fields=COUNTER_FIELDS)
+
+        if completed:
+            credit_points(habit.user_id, COMPLETION_POINTS, PointsEvent.HABIT_COMPLETED, habit.id)
+
+        if bool(completed) != was_completed:
+            rollups.record_change(habit, day, completed)
+
+    return log, created
+
+
+def rebuild_streak_counters(habit):
+    """Recompute and save a habit's stored counters from its full history"""
+    refresh_streak_counters(habit)
+    habit.save(update_fields=COUNTER_FIELDS)
+
+
+def upsert_habit_logs(user, entries):
+    """
+    Apply many (habit_id, date, completed) entries across the user's habits
+    in one transaction: one upsert for the logs, one ledger insert for points,
+    and a single achievement evaluation for the whole batch.
+    """
+    # The last entry for a given habit and day wins.
+    entries = {(habit_id, day): completed for habit_id, day, completed in entries}
+    habit_ids = {habit_id for habit_id, _ in entries}
+
+    with transaction.atomic():
+        habits = {habit.id: habit for habit in Habit.objects.select_for_update().filter(user=user, id__in=habit_ids)}
+        unknown = habit_ids - set(habits)
+        if unknown:
+            raise Habit.DoesNotExist(f'Unknown habits: {sorted(unknown)}')
+
+        previous = {
+            (habit_id, day): completed
+            for habit_id, day, completed in HabitLog.objects.filter(
+                habit_id__in=habit_ids, date__in={day for _, day in entries}
+            ).values_list('habit_id', 'date', 'completed')
+        }
+
+        HabitLog.objects.bulk_create(
+            [HabitLog(habit_id=habit_id, date=day, completed=completed)
+             for (habit_id, day), completed in entries.items()],
+            update_conflicts=True,
+            unique_fields=['habit', 'date'],
+            update_fields=['completed']
+        )
+
+        credit_many(user.id, [
+            (habit_id, COMPLETION_POINTS, PointsEvent.HABIT_COMPLETED)
+            for (habit_id, _), completed in entries.items() if completed
+        ])
+
+        changes = [
+            (habit_id, day, completed)
+            for (habit_id, day), completed in entries.items()
+            if completed != previous.get((habit_id, day), False)
+        ]
+        bitmaps.set_days(changes)
+
+        changed = [habits[habit_id] for habit_id in {habit_id for habit_id, _, _ in changes}]
+        completed_dates = load_completed_dates(changed)
+        for habit in changed:
+            refresh_streak_counters(habit, completed_dates.get(habit.id, set()))
+        Habit.objects.bulk_update(changed, COUNTER_FIELDS)
+
+        rollups.record_changes(user.id, [(habits[habit_id], day, completed) for habit_id, day, completed in changes])
+
+        if any(completed for _, _, completed in changes):
+            schedule_evaluation(user.id)
+
+    return {
+        'created': sum(1 for key in entries if key not in previous),
+        'updated': sum(1 for key in entries if key in previous),
+        'changed': len(changes),
+    }
@@ -1,29 +1,25 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
-from datetime import date, timedelta
-from .models import HabitLog, UserStats, UserAchievement, Achievement
+from .models import HabitLog, Achievement, UserAchievement, UserStats
+from .achievements import clear_definitions, schedule_evaluation
+from .gamification import invalidate
 
 
 @receiver(post_save, sender=HabitLog)
-def check_achievements(sender, instance, created, **kwargs):
-    if not created or not instance.completed:
-        return
+def check_achievements(sender, instance, **kwargs):
+    if instance.completed:
+        schedule_evaluation(instance.habit.user_id)
 
-    user = instance.habit.user
 
-    user_stats, _ = UserStats.objects.get_or_create(user=user)
+@receiver(post_save, sender=Achievement)
+@receiver(post_delete, sender=Achievement)
+def reset_achievement_cache(sender, **kwargs):
+    clear_definitions()
 
-    achievement_checks = [
-        ('First Step', lambda: True),
-        ('Week Warrior', lambda: instance.habit.get_current_streak() >= 7),
-        ('Month Master', lambda: instance.habit.get_current_streak() >= 30),
-        ('Diverse', lambda: user.habits.count() >= 5),
-    ]
 
-    for name, check_func in achievement_checks:
-        achievement = Achievement.objects.filter(name=name).first()
-        if achievement and not UserAchievement.objects.filter(user=user, achievement=achievement).exists():
-            if check_func():
-                UserAchievement.objects.create(user=user, achievement=achievement)
-                if achievement.points_required > 0:
-                    user_stats.add_points(achievement.points_required)
+@receiver(post_save, sender=UserAchievement)
+@receiver(post_delete, sender=UserAchievement)
+@receiver(post_save, sender=UserStats)
+@receiver(post_delete, sender=UserStats)
+def reset_gamification_snapshot(sender, instance, **kwargs):
+    invalidate(instance.user_id)
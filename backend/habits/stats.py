@@ -0,0 +1,228 @@
+from collections import defaultdict
+from datetime import date, timedelta
+
+from .models import HabitLog
+
+# Any Monday works as a reference point for mapping weekdays to dates.
+REFERENCE_MONDAY = date(2024, 1, 1)
+
+
+def due_weekdays(habit):
+    """Return the set of weekdays (0 = Monday) the habit is due on"""
+    return frozenset(
+        weekday for weekday in range(7)
+        if habit.is_due_on(REFERENCE_MONDAY + timedelta(days=weekday))
+    )
+
+
+def count_due_days(habit, start, end):
+    """Count due days between start and end (inclusive) without walking every day"""
+    total_days = (end - start).days + 1
+    if total_days <= 0:
+        return 0
+
+    weekdays = due_weekdays(habit)
+    full_weeks, remainder = divmod(total_days, 7)
+    count = full_weeks * len(weekdays)
+    for offset in range(remainder):
+        if (start + timedelta(days=offset)).weekday() in weekdays:
+            count += 1
+    return count
+
+
+def load_completed_dates(habits):
+    """Fetch completed log dates for all given habits in a single query"""
+    dates = defaultdict(set)
+    rows = HabitLog.objects.filter(
+        habit__in=[habit.id for habit in habits], completed=True
+    ).values_list('habit_id', 'date')
+    for habit_id, log_date in rows:
+        dates[habit_id].add(log_date)
+    return dates
+
+
+def current_streak(habit, dates, today=None):
+    """Count consecutive completed due days ending today (or the last due day)"""
+    if not dates:
+        return 0
+
+    today = today or date.today()
+    start_date = habit.created_at.date()
+    weekdays = due_weekdays(habit)
+
+    def previous_due(day):
+        day -= timedelta(days=1)
+        while day >= start_date and day.weekday() not in weekdays:
+            day -= timedelta(days=1)
+        return day
+
+    current_date = today
+    if current_date.weekday() not in weekdays:
+        current_date = previous_due(current_date)
+
+    if current_date < start_date:
+        return 0
+
+    streak = 0
+    while current_date in dates:
+        streak += 1
+        current_date = previous_due(current_date)
+        if current_date < start_date:
+            break
+
+    return streak
+
+
+def longest_streak(habit, dates):
+    """Find the longest run of consecutive completed days"""
+    start_date = habit.created_at.date()
+    longest = 0
+    current = 0
+    prev_date = None
+
+    for log_date in sorted(dates):
+        if log_date < start_date:
+            continue
+        if prev_date is not None and (log_date - prev_date).days == 1:
+            current += 1
+        else:
+            current = 1
+        longest = max(longest, current)
+        prev_date = log_date
+
+    return longest
+
+
+def rated_dates(habit, dates, today=None):
+    """Completed dates that count toward the completion rate: due days from creation up to today"""
+    start_date = habit.created_at.date()
+    weekdays = due_weekdays(habit)
+    return [
+        log_date for log_date in dates
+        if log_date >= start_date and (today is None or log_date <= today) and log_date.weekday() in weekdays
+    ]
+
+
+def completion_rate(habit, dates, today=None):
+    """Completion rate since the habit was created, as a percentage of due days"""
+    if not dates:
+        return 0
+
+    today = today or date.today()
+    due_days = count_due_days(habit, habit.created_at.date(), today)
+    if due_days == 0:
+        return 0
+    return (len(rated_dates(habit, dates, today)) / due_days) * 100
+
+
+def streak_anchor(habit, day):
+    """Return the due day a streak is counted back from: day itself or the last due day before it"""
+    weekdays = due_weekdays(habit)
+    for offset in range(7):
+        candidate = day - timedelta(days=offset)
+        if candidate.weekday() in weekdays:
+            return candidate
+    return None
+
+
+def streak_counters(habit, dates):
+    """Derive the stored streak counters of a habit from its completed dates"""
+    last_completed_date = max(dates) if dates else None
+    return {
+        'current_streak': current_streak(habit, dates, last_completed_date),
+        'longest_streak': longest_streak(habit, dates),
+        'last_completed_date': last_completed_date,
+        'completed_count': len(rated_dates(habit, dates)),
+    }
+
+
+def refresh_streak_counters(habit, dates=None):
+    """Recompute a habit's stored counters from its full history (not saved)"""
+    if dates is None:
+        dates = habit.get_completed_dates()
+    for field, value in streak_counters(habit, dates).items():
+        setattr(habit, field, value)
+
+
+def apply_log_change(habit, day, completed, was_completed):
+    """
+    Update a habit's stored counters after the log for day changed (not saved).
+
+    Completing a day after the last completion extends the counters in place;
+    un-completing or back-dating a day recomputes them from the habit's history.
+    """
+    if completed == was_completed:
+        return
+
+    last = habit.last_completed_date
+    if not completed or (last is not None and day <= last):
+        refresh_streak_counters(habit)
+        return
+
+    start_date = habit.created_at.date()
+    anchor = streak_anchor(habit, day)
+    if anchor is None or anchor < start_date:
+        streak = 0
+    elif last is not None and streak_anchor(habit, last) == anchor:
+        # Completed a non-due day; the streak still ends at the same due day.
+        streak = habit.current_streak
+    elif anchor != day:
+        streak = 0
+    elif last is not None and streak_anchor(habit, day - timedelta(days=1)) == streak_anchor(habit, last):
+        streak = habit.current_streak + 1 if streak_anchor(habit, last) >= start_date else 1
+    else:
+        streak = 1
+
+    if day >= start_date:
+        if habit.frequency == 'daily':
+            run = streak
+        else:
+            window_start = max(start_date, day - timedelta(days=habit.longest_streak + 1))
+            recent = set(habit.logs.filter(
+                completed=True, date__gte=window_start, date__lt=day
+            ).values_list('date', flat=True))
+            run = 1
+            while day - timedelta(days=run) in recent:
+                run += 1
+        habit.longest_streak = max(habit.longest_streak, run)
+
+    habit.current_streak = streak
+    habit.last_completed_date = day
+    if day >= start_date and day.weekday() in due_weekdays(habit):
+        habit.completed_count += 1
+
+
+def current_streak_from_counters(habit, today=None):
+    """Read the current streak from the stored counters"""
+    today = today or date.today()
+    if habit.last_completed_date is None:
+        return 0
+
+    anchor = streak_anchor(habit, today)
+    if anchor is None or anchor < habit.created_at.date():
+        return 0
+
+    last_anchor = streak_anchor(habit, habit.last_completed_date)
+    if anchor == last_anchor:
+        return habit.current_streak
+    if anchor > last_anchor:
+        return 0
+    # Completions were logged ahead of today; fall back to the history.
+    return current_streak(habit, habit.get_completed_dates(), today)
+
+
+def completion_rate_from_counters(habit, today=None):
+    """
+    Completion rate since the habit was created, from the stored counters.
+    completed_count only counts due days from creation on, so this matches
+    completion_rate() except for completions logged ahead of today, which
+    the cap at 100% absorbs.
+    """
+    if not habit.completed_count:
+        return 0
+
+    today = today or date.today()
+    due_days = count_due_days(habit, habit.created_at.date(), today)
+    if due_days == 0:
+        return 0
+    return min(habit.completed_count / due_days, 1) * 100
@@ -0,0 +1,30 @@
+from datetime import date, datetime, timedelta
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.utils import timezone
+
+from .models import Habit
+from .services import toggle_habit_log
+from .stats import completion_rate
+
+
+class CompletionRateTests(TestCase):
+    def test_logs_outside_the_window_do_not_inflate_the_rate(self):
+        user = User.objects.create(username='rate')
+        habit = Habit.objects.create(user=user, name='Run', frequency='weekdays')
+        created = date(2024, 1, 8)  # a Monday
+        Habit.objects.filter(pk=habit.pk).update(created_at=timezone.make_aware(datetime(2024, 1, 8, 9)))
+        habit.refresh_from_db()
+        today = created + timedelta(days=13)
+
+        # Every due day in the window, plus logs before creation and on weekends.
+        days = [created + timedelta(days=offset) for offset in range(14)]
+        days += [created - timedelta(days=offset) for offset in range(1, 6)]
+        for day in days:
+            toggle_habit_log(habit, day, True)
+        habit.refresh_from_db()
+
+        self.assertEqual(habit.completed_count, 10)
+        self.assertEqual(completion_rate(habit, habit.get_completed_dates(), today), 100)
+        self.assertEqual(habit.completion_rate_on(today), 100)
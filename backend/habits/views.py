@@ -4,15 +4,27 @@ from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.views import APIView
 from django.db import IntegrityError
-from django.db.models import Count
+from django.db.models import Count, Exists, F, Max, OuterRef
+from django.utils.cache import get_conditional_response
+from django.utils.http import quote_etag
 from datetime import date, timedelta
-from collections import Counter
+import hashlib
 
-from .models import Habit, HabitLog, Achievement, UserAchievement, UserStats
+from .models import Habit, HabitLog, HabitYearBitmap, HabitInsights
 from .serializers import (
-    HabitSerializer, HabitLogSerializer, HabitCreateSerializer,
-    AchievementSerializer, UserStatsSerializer, AnalyticsSerializer
+    HabitSerializer, HabitLogSerializer, HabitCreateSerializer, HabitLogBulkSerializer,
+    AchievementSerializer, UserStatsSerializer, AnalyticsSerializer, HabitInsightsSerializer
 )
+from .services import toggle_habit_log, rebuild_streak_counters, upsert_habit_logs
+from .analytics import build_analytics, load_window
+from .bitmaps import to_base64, to_runs
+from .achievements import get_definitions
+from .gamification import get_snapshot
+from .insights import compute_insights, store_insights
+from . import rollups
+
+MAX_ANALYTICS_DAYS = 3660
+MAX_ANALYTICS_WEEKS = 520
 
 
 class HabitViewSet(viewsets.ModelViewSet):
@@ -20,7 +32,8 @@ class HabitViewSet(viewsets.ModelViewSet):
     permission_classes = [IsAuthenticated]
 
     def get_queryset(self):
-        return Habit.objects.filter(user=self.request.user)
+        today_logs = HabitLog.objects.filter(habit=OuterRef('pk'), date=date.today(), completed=True)
+        return Habit.objects.filter(user=self.request.user).annotate(today_completed=Exists(today_logs))
 
     def get_serializer_class(self):
         if self.action == 'create':
@@ -29,6 +42,19 @@ class HabitViewSet(viewsets.ModelViewSet):
 
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
+        rollups.refresh_day(self.request.user.id, date.today())
+
+    def perform_update(self, serializer):
+        habit = serializer.save()
+        if {'frequency', 'target_days'} & set(serializer.validated_data):
+            rebuild_streak_counters(habit)
+        if {'frequency', 'target_days', 'category'} & set(serializer.validated_data):
+            rollups.refresh_since(self.request.user.id, habit.created_at.date())
+
+    def perform_destroy(self, instance):
+        since = instance.created_at.date()
+        instance.delete()
+        rollups.refresh_since(self.request.user.id, since)
 
     def destroy(self, request, *args, **kwargs):
         instance = self.get_object()
@@ -43,6 +69,70 @@ class HabitViewSet(viewsets.ModelViewSet):
         serializer = HabitLogSerializer(logs, many=True)
         return Response(serializer.data)
 
+    @action(detail=True, methods=['get'], url_path='heatmap')
+    def habit_heatmap(self, request, pk=None):
+        return self.heatmap_response(request, [self.get_object()])
+
+    @action(detail=False, methods=['get'])
+    def heatmap(self, request):
+        return self.heatmap_response(request, list(self.get_queryset()))
+
+    def heatmap_response(self, request, habits):
+        encoding = request.query_params.get('encoding', 'bitset')
+        if encoding not in ('bitset', 'runs'):
+            return Response({'error': 'encoding must be bitset or runs'}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            if 'start' in request.query_params:
+                start = date.fromisoformat(request.query_params['start'])
+                end = date.fromisoformat(request.query_params.get('end', str(date.today())))
+            else:
+                year = int(request.query_params.get('year', date.today().year))
+                start, end = date(year, 1, 1), date(year, 12, 31)
+        except ValueError:
+            return Response(
+                {'error': 'year must be a year, start/end must be in YYYY-MM-DD format'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if not start <= end <= start + timedelta(days=MAX_ANALYTICS_DAYS):
+            return Response(
+                {'error': f'end must be within {MAX_ANALYTICS_DAYS} days after start'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        changes = HabitYearBitmap.objects.filter(
+            habit__in=habits, year__gte=start.year, year__lte=end.year
+        ).aggregate(last_modified=Max('updated_at'), count=Count('id'))
+        # Only an ETag is sent: the habits' names, colors and membership are part of the
+        # payload but not of the bitmaps' updated_at, so a Last-Modified from it would go stale.
+        etag = quote_etag(hashlib.md5(repr((
+            sorted((habit.id, habit.name, habit.color) for habit in habits),
+            start, end, encoding, changes['last_modified'], changes['count']
+        )).encode()).hexdigest())
+
+        not_modified = get_conditional_response(request, etag=etag)
+        if not_modified is not None:
+            return not_modified
+
+        days = (end - start).days + 1
+        matrix = load_window(habits, start, end)
+        response = Response({
+            'start': start,
+            'end': end,
+            'encoding': encoding,
+            'habits': [
+                {
+                    'id': habit.id,
+                    'name': habit.name,
+                    'color': habit.color,
+                    'data': to_base64(matrix[habit.id], days) if encoding == 'bitset' else to_runs(matrix[habit.id]),
+                }
+                for habit in habits
+            ]
+        })
+        response['ETag'] = etag
+        return response
+
     @action(detail=True, methods=['post'])
     def toggle_log(self, request, pk=None):
         habit = self.get_object()
@@ -56,16 +146,15 @@ class HabitViewSet(viewsets.ModelViewSet):
             )
 
         try:
-            log, created = HabitLog.objects.update_or_create(
-                habit=habit,
-                date=date_str,
-                defaults={'completed': completed}
+            day = date.fromisoformat(date_str)
+        except (TypeError, ValueError):
+            return Response(
+                {'error': 'date must be in YYYY-MM-DD format'},
+                status=status.HTTP_400_BAD_REQUEST
             )
 
-            if completed:
-                habit.points += 10
-                habit.save()
-
+        try:
+            log, created = toggle_habit_log(habit, day, completed)
             serializer = HabitLogSerializer(log)
             return Response(serializer.data, status=status.HTTP_201_CREATED if created else status.HTTP_200_OK)
         except IntegrityError:
@@ -74,15 +163,40 @@ class HabitViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
+    @action(detail=False, methods=['post'])
+    def bulk_log(self, request):
+        serializer = HabitLogBulkSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        entries = [
+            (entry['habit'], entry['date'], entry['completed'])
+            for entry in serializer.validated_data['entries']
+        ]
+
+        try:
+            result = upsert_habit_logs(request.user, entries)
+        except Habit.DoesNotExist as e:
+            return Response({'error': str(e)}, status=status.HTTP_404_NOT_FOUND)
+        return Response(result)
+
     @action(detail=False, methods=['get'])
     def due_today(self, request):
-        habits = self.get_queryset()
-        due_habits = []
+        date_str = request.query_params.get('date')
+        try:
+            day = date.fromisoformat(date_str) if date_str else date.today()
+        except ValueError:
+            return Response(
+                {'error': 'date must be in YYYY-MM-DD format'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
 
-        for habit in habits:
-            if habit.reminder_enabled and habit.is_due_today():
-                if not habit.logs.filter(date=date.today(), completed=True).exists():
-                    due_habits.append(habit)
+        completed_logs = HabitLog.objects.filter(habit=OuterRef('pk'), date=day, completed=True)
+        due_habits = (
+            self.get_queryset()
+            .filter(reminder_enabled=True)
+            .annotate(due_bit=F('due_mask').bitand(1 << day.weekday()))
+            .filter(due_bit__gt=0)
+            .filter(~Exists(completed_logs))
+        )
 
         serializer = HabitSerializer(due_habits, many=True)
         return Response(serializer.data)
@@ -90,7 +204,23 @@ class HabitViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'])
     def analytics(self, request):
         habits = self.get_queryset()
-        user = request.user
+
+        if 'start' in request.query_params or 'range' in request.query_params:
+            return self.range_analytics(request, habits)
+
+        try:
+            days = int(request.query_params.get('days', 28))
+            weeks = int(request.query_params.get('weeks', 4))
+        except ValueError:
+            return Response(
+                {'error': 'days and weeks must be integers'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if not (1 <= days <= MAX_ANALYTICS_DAYS and 1 <= weeks <= MAX_ANALYTICS_WEEKS):
+            return Response(
+                {'error': f'days must be 1-{MAX_ANALYTICS_DAYS} and weeks 1-{MAX_ANALYTICS_WEEKS}'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
 
         if not habits.exists():
             return Response({
@@ -100,87 +230,58 @@ class HabitViewSet(viewsets.ModelViewSet):
                 'weekly_summary': []
             })
 
-        total_logs = 0
-        total_due = 0
-        day_counts = Counter()
+        return Response(build_analytics(habits, days=days, weeks=weeks))
 
+    def range_analytics(self, request, habits):
         today = date.today()
-        four_weeks_ago = today - timedelta(weeks=4)
-
-        for habit in habits:
-            logs = habit.logs.filter(completed=True)
-            total_logs += logs.count()
-
-            for i in range(0, 28):
-                check_date = today - timedelta(days=i)
-                if habit.is_due_on(check_date):
-                    total_due += 1
-                    if logs.filter(date=check_date).exists():
-                        day_counts[check_date.weekday()] += 1
-
-        overall_rate = (total_logs / total_due * 100) if total_due > 0 else 0
-
-        best_day = day_counts.most_common(1)[0][0] if day_counts else 0
-        day_names = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
-
-        habits_data = []
-        for habit in habits:
-            rate = habit.get_completion_rate()
-            habits_data.append({
-                'id': habit.id,
-                'name': habit.name,
-                'completion_rate': rate
-            })
-
-        most_consistent = max(habits_data, key=lambda x: x['completion_rate']) if habits_data else None
-
-        weekly_summary = []
-        for week in range(4):
-            week_end = today - timedelta(weeks=week)
-            week_start = week_end - timedelta(days=6)
-            completed = 0
-            total = 0
-
-            for d in range(7):
-                check_date = week_start + timedelta(days=d)
-                for habit in habits:
-                    if habit.is_due_on(check_date):
-                        total += 1
-                        if habit.logs.filter(date=check_date, completed=True).exists():
-                            completed += 1
-
-            weekly_summary.append({
-                'week': f'Week {4 - week}',
-                'completed': completed,
-                'total': total
-            })
+        range_name = request.query_params.get('range')
+        try:
+            end = date.fromisoformat(request.query_params['end']) if 'end' in request.query_params else today
+            if range_name == 'year':
+                start = end - timedelta(days=364)
+            elif range_name == 'all':
+                first = habits.order_by('created_at').first()
+                start = first.created_at.date() if first else end
+            else:
+                start = date.fromisoformat(request.query_params['start'])
+        except (KeyError, ValueError):
+            return Response(
+                {'error': 'start/end must be in YYYY-MM-DD format, or range must be year or all'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if not start <= end <= start + timedelta(days=MAX_ANALYTICS_DAYS):
+            return Response(
+                {'error': f'end must be within {MAX_ANALYTICS_DAYS} days after start'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
 
-        weekly_summary.reverse()
+        return Response(rollups.build_range_analytics(request.user, habits, start, end))
 
-        return Response({
-            'overall_completion_rate': round(overall_rate, 1),
-            'best_day_of_week': day_names[best_day] if best_day < 7 else 'N/A',
-            'most_consistent_habit': most_consistent,
-            'weekly_summary': weekly_summary
-        })
+    @action(detail=False, methods=['get'])
+    def insights(self, request):
+        insights = HabitInsights.objects.filter(user=request.user).first()
+        if insights is None:
+            # Not yet picked up by the nightly compute_habit_insights run.
+            store_insights([compute_insights(request.user.id)])
+            insights = HabitInsights.objects.get(user=request.user)
+        return Response(HabitInsightsSerializer(insights).data)
 
 
 class GamificationView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
-        user = request.user
-
-        user_stats, created = UserStats.objects.get_or_create(user=user)
+        snapshot = get_snapshot(request.user.id)
 
-        achievements = Achievement.objects.all()
-        serializer = AchievementSerializer(achievements, many=True, context={'request': request})
+        serializer = AchievementSerializer(
+            get_definitions(), many=True, context={'request': request, 'unlocked_ids': snapshot['unlocked_ids']}
+        )
 
         return Response({
-            'points': user_stats.total_points,
-            'level': user_stats.level,
-            'title': user_stats.title,
-            'progress': round(user_stats.get_progress_to_next_level(), 1),
+            'points': snapshot['points'],
+            'level': snapshot['level'],
+            'title': snapshot['title'],
+            'progress': snapshot['progress'],
             'achievements': serializer.data
         })
 
@@ -189,6 +290,8 @@ class AchievementsView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
-        achievements = Achievement.objects.all()
-        serializer = AchievementSerializer(achievements, many=True, context={'request': request})
+        snapshot = get_snapshot(request.user.id)
+        serializer = AchievementSerializer(
+            get_definitions(), many=True, context={'request': request, 'unlocked_ids': snapshot['unlocked_ids']}
+        )
         return Response(serializer.data)
@@ -1,7 +1,8 @@
 from django.contrib import admin
-from .models import Folder, Tag, Note, NoteImage  # Replace with your actual models
+from .models import Folder, Tag, Note, NoteImage, NoteRevision  # Replace with your actual models
 
 admin.site.register(Folder)
 admin.site.register(Tag)
 admin.site.register(Note)
-admin.site.register(NoteImage)
\ No newline at end of file
+admin.site.register(NoteImage)
+admin.site.register(NoteRevision)
@@ -0,0 +1,56 @@
+"""
+Per-user sidebar counts (notes per folder, per folder subtree and per tag,
+plus pinned, archived and trash totals), cached until one of the user's
+notes, folders or tags changes.
+"""
+from collections import defaultdict
+
+from django.db.models import Count, Q
+
+from common import cache
+
+from .models import Folder, Note
+
+COUNTS_NAMESPACE = 'notes:counts'
+COUNTS_TIMEOUT = 60 * 60
+
+
+def invalidate(user_id):
+    """Drop the user's counts once the current transaction commits"""
+    cache.invalidate(COUNTS_NAMESPACE, user_id)
+
+
+def build_counts(user_id):
+    notes = Note.objects.filter(user_id=user_id)
+    live = Q(is_deleted=False)
+    counts = notes.aggregate(
+        all=Count('id', filter=live),
+        pinned=Count('id', filter=live & Q(is_pinned=True)),
+        archived=Count('id', filter=live & Q(is_archived=True)),
+        unfiled=Count('id', filter=live & Q(folder__isnull=True)),
+        trash=Count('id', filter=Q(is_deleted=True)),
+    )
+
+    # Direct counts per folder, rolled up along each folder's path into subtree totals.
+    folders = Folder.objects.filter(user_id=user_id).annotate(
+        count=Count('notes', filter=Q(notes__is_deleted=False))
+    ).values_list('id', 'path', 'count').order_by()
+    counts['folders'] = {}
+    counts['folder_totals'] = defaultdict(int)
+    for folder_id, path, count in folders:
+        if not count:
+            continue
+        counts['folders'][folder_id] = count
+        for ancestor in path.strip('/').split('/'):
+            counts['folder_totals'][int(ancestor)] += count
+    counts['folder_totals'] = dict(counts['folder_totals'])
+
+    tags = Note.tags.through.objects.filter(note__user_id=user_id, note__is_deleted=False).values(
+        'tag_id'
+    ).annotate(count=Count('id')).order_by()
+    counts['tags'] = {row['tag_id']: row['count'] for row in tags}
+    return counts
+
+
+def get_counts(user_id):
+    return cache.get_or_build(COUNTS_NAMESPACE, user_id, build_counts, COUNTS_TIMEOUT)
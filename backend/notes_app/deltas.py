@@ -0,0 +1,23 @@
+"""
+Text deltas for note autosave. An op replaces `delete` characters at `offset`
+with `insert`; ops apply in order, each against the result of the previous one.
+Offsets and lengths count UTF-16 code units, as JavaScript strings do, so an
+editor can send its selection indices unchanged.
+"""
+
+UNIT = 2  # bytes per UTF-16 code unit
+
+
+def apply_ops(text, ops):
+    """Return text with the ops applied; raises ValueError if an op does not fit"""
+    data = text.encode('utf-16-le')
+    for op in ops:
+        start = op['offset'] * UNIT
+        end = start + op.get('delete', 0) * UNIT
+        if end > len(data):
+            raise ValueError(f"op at offset {op['offset']} runs past the end of the note")
+        data = data[:start] + op.get('insert', '').encode('utf-16-le') + data[end:]
+    try:
+        return data.decode('utf-16-le')
+    except UnicodeDecodeError:
+        raise ValueError('ops split a surrogate pair')
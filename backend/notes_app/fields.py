@@ -0,0 +1,104 @@
+"""
+CompressedTextField: a text field stored as bytes in a binary column. Values
+of at least `threshold` characters are zlib-compressed; shorter ones are kept
+as plain UTF-8. Each stored value starts with a flag byte saying which.
+Compressed rows are only inflated when the attribute is first read on an
+instance, so rows loaded but never read (or whose content is deferred) cost
+no decompression.
+
+The database cannot read the stored bytes, so text lookups on the field are
+not supported; search goes through Note.search_vector or the FTS5 table.
+"""
+import zlib
+
+from django.db import models
+from django.db.models.query_utils import DeferredAttribute
+
+PLAIN = b'\x00'
+COMPRESSED = b'\x01'
+
+
+def encode_text(value, threshold):
+    if len(value) >= threshold:
+        return COMPRESSED + zlib.compress(value.encode('utf-8'))
+    return PLAIN + value.encode('utf-8')
+
+
+def decode_text(data):
+    data = bytes(data)
+    if data[:1] == COMPRESSED:
+        return zlib.decompress(data[1:]).decode('utf-8')
+    return data[1:].decode('utf-8')
+
+
+class CompressedText:
+    """A compressed value read from the database, inflated on demand"""
+
+    def __init__(self, stored):
+        self.stored = stored
+
+    def decompress(self):
+        return decode_text(self.stored)
+
+    def __str__(self):
+        return self.decompress()
+
+
+class CompressedTextDescriptor(DeferredAttribute):
+    def __get__(self, instance, cls=None):
+        if instance is None:
+            return self
+        value = super().__get__(instance, cls)
+        if isinstance(value, CompressedText):
+            value = value.decompress()
+            instance.__dict__[self.field.attname] = value
+        return value
+
+    def __set__(self, instance, value):
+        instance.__dict__[self.field.attname] = value
+
+
+class CompressedTextField(models.TextField):
+    descriptor_class = CompressedTextDescriptor
+
+    def __init__(self, *args, threshold=4096, **kwargs):
+        self.threshold = threshold
+        super().__init__(*args, **kwargs)
+
+    def deconstruct(self):
+        name, path, args, kwargs = super().deconstruct()
+        if self.threshold != 4096:
+            kwargs['threshold'] = self.threshold
+        return name, path, args, kwargs
+
+    def db_type(self, connection):
+        return models.BinaryField().db_type(connection)
+
+    def from_db_value(self, value, expression, connection):
+        if value is None:
+            return value
+        value = bytes(value)
+        if value[:1] == COMPRESSED:
+            return CompressedText(value)
+        return decode_text(value)
+
+    def to_python(self, value):
+        if isinstance(value, CompressedText):
+            return value.decompress()
+        if isinstance(value, (bytes, memoryview)):
+            return decode_text(value)
+        return super().to_python(value)
+
+    def get_prep_value(self, value):
+        if isinstance(value, CompressedText):
+            return value.stored
+        value = super().get_prep_value(value)
+        if value is None:
+            return value
+        return encode_text(value, self.threshold)
+
+    def get_db_prep_value(self, value, connection, prepared=False):
+        value = super().get_db_prep_value(value, connection, prepared)
+        if value is not None:
+            return connection.Database.Binary(value)
+        return value
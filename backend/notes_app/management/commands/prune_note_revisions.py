@@ -0,0 +1,28 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from notes_app.models import NoteRevision
+
+
+class Command(BaseCommand):
+    help = 'Thin note history: drop diff revisions older than the retention window, keeping snapshots'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=30, help='Keep every revision newer than this')
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options['days'])
+        # A diff depends only on newer revisions, so dropping the oldest ones never breaks a chain.
+        old_diffs = NoteRevision.objects.filter(is_full=False, created_at__lt=cutoff)
+
+        deleted = 0
+        while True:
+            ids = list(old_diffs.values_list('id', flat=True)[:options['batch_size']])
+            if not ids:
+                break
+            deleted += NoteRevision.objects.filter(id__in=ids).delete()[0]
+
+        self.stdout.write(self.style.SUCCESS(f'Deleted {deleted} note revisions'))
@@ -0,0 +1,34 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from notes_app.models import Note
+from notes_app.services import purge_notes
+
+
+class Command(BaseCommand):
+    help = 'Permanently delete notes that have been in the trash longer than the retention window'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=30, help='Keep trashed notes newer than this')
+        parser.add_argument('--batch-size', type=int, default=200, help='Notes deleted per transaction')
+        parser.add_argument('--pause', type=float, default=0, help='Seconds to sleep between batches')
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options['days'])
+        expired = Note.objects.filter(is_deleted=True, deleted_at__lt=cutoff).order_by('id')
+
+        total = 0
+        last_id = 0
+        while True:
+            ids = list(expired.filter(id__gt=last_id).values_list('id', flat=True)[:options['batch_size']])
+            if not ids:
+                break
+            total += purge_notes(ids, trashed_before=cutoff)
+            last_id = ids[-1]
+            if options['pause']:
+                time.sleep(options['pause'])
+
+        self.stdout.write(self.style.SUCCESS(f'Purged {total} trashed notes'))
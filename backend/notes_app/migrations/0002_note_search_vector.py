@@ -0,0 +1,48 @@
+# Generated by Django 5.2.18 on 2026-10-18 00:11
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+FTS_TABLE = 'notes_app_note_fts'
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute(
+            'CREATE INDEX notes_note_search_vector_idx ON notes_app_note USING GIN (search_vector)'
+        )
+        schema_editor.execute(
+            "UPDATE notes_app_note SET search_vector = "
+            "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+            "setweight(to_tsvector('english', coalesce(content, '')), 'B')"
+        )
+    elif vendor == 'sqlite':
+        schema_editor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(title, content, tokenize='porter unicode61')"
+        )
+        schema_editor.execute(f'INSERT INTO {FTS_TABLE} (rowid, title, content) SELECT id, title, content FROM notes_app_note')
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute('DROP INDEX IF EXISTS notes_note_search_vector_idx')
+    elif vendor == 'sqlite':
+        schema_editor.execute(f'DROP TABLE IF EXISTS {FTS_TABLE}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notes_app', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='note',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,34 @@
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+TRIGRAM_INDEXES = [
+    ('notes_note_title_trgm_idx', 'notes_app_note', 'title'),
+    ('notes_tag_name_trgm_idx', 'notes_app_tag', 'name'),
+]
+
+
+def create_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name, table, column in TRIGRAM_INDEXES:
+        schema_editor.execute(f'CREATE INDEX IF NOT EXISTS {name} ON {table} USING GIN ({column} gin_trgm_ops)')
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name, _, _ in TRIGRAM_INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {name}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notes_app', '0002_note_search_vector'),
+    ]
+
+    operations = [
+        # Creates pg_trgm on Postgres only; projects_app's trigram indexes depend on this migration.
+        TrigramExtension(),
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
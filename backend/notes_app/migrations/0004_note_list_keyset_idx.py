@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 00:14
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notes_app', '0003_trigram_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='note',
+            options={'ordering': ['-is_pinned', '-updated_at', '-id']},
+        ),
+        migrations.AddIndex(
+            model_name='note',
+            index=models.Index(fields=['user', 'is_deleted', '-is_pinned', '-updated_at', '-id'], name='note_list_keyset_idx'),
+        ),
+    ]
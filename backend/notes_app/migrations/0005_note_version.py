@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 00:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notes_app', '0004_note_list_keyset_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='note',
+            name='version',
+            field=models.PositiveIntegerField(default=1),
+        ),
+    ]
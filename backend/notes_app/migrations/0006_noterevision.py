@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-18 00:16
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notes_app', '0005_note_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NoteRevision',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.PositiveIntegerField()),
+                ('is_full', models.BooleanField(default=True)),
+                ('is_snapshot', models.BooleanField(default=False)),
+                ('data', models.BinaryField()),
+                ('size', models.IntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('note', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='revisions', to='notes_app.note')),
+            ],
+            options={
+                'ordering': ['-version'],
+                'unique_together': {('note', 'version')},
+            },
+        ),
+    ]
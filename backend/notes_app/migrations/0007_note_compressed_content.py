@@ -0,0 +1,70 @@
+# Generated by Django 5.2.18 on 2026-10-18 00:20
+
+from django.db import migrations, models, transaction
+
+import notes_app.fields
+
+BATCH_SIZE = 500
+PREVIEW_LENGTH = 200
+
+
+def copy_content(apps, source, target, fields):
+    # Each batch commits on its own so large tables are not locked for the whole run.
+    Note = apps.get_model('notes_app', 'Note')
+    last_id = 0
+    while True:
+        with transaction.atomic():
+            batch = list(Note.objects.filter(id__gt=last_id).order_by('id').only('id', source)[:BATCH_SIZE])
+            if not batch:
+                break
+            for note in batch:
+                content = str(getattr(note, source) or '')
+                setattr(note, target, content)
+                if 'preview' in fields:
+                    note.preview = content[:PREVIEW_LENGTH]
+            Note.objects.bulk_update(batch, fields)
+        last_id = batch[-1].id
+
+
+def compress_contents(apps, schema_editor):
+    copy_content(apps, 'content', 'content_data', ['content_data', 'preview'])
+
+
+def decompress_contents(apps, schema_editor):
+    copy_content(apps, 'content_data', 'content', ['content'])
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('notes_app', '0006_noterevision'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='note',
+            name='preview',
+            field=models.CharField(blank=True, default='', editable=False, max_length=200),
+        ),
+        migrations.AddField(
+            model_name='note',
+            name='content_data',
+            field=notes_app.fields.CompressedTextField(blank=True, null=True),
+        ),
+        migrations.RunPython(compress_contents, decompress_contents),
+        migrations.RemoveField(
+            model_name='note',
+            name='content',
+        ),
+        migrations.RenameField(
+            model_name='note',
+            old_name='content_data',
+            new_name='content',
+        ),
+        migrations.AlterField(
+            model_name='note',
+            name='content',
+            field=notes_app.fields.CompressedTextField(blank=True, default=''),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-18 00:21
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import CharField, Value
+from django.db.models.functions import Cast, Concat
+
+
+def populate_paths(apps, schema_editor):
+    # Existing folders are all top-level.
+    Folder = apps.get_model('notes_app', 'Folder')
+    Folder.objects.update(path=Concat(Value('/'), Cast('id', CharField()), Value('/')))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notes_app', '0007_note_compressed_content'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='folder',
+            name='parent',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='children', to='notes_app.folder'),
+        ),
+        migrations.AddField(
+            model_name='folder',
+            name='path',
+            field=models.CharField(db_index=True, default='', editable=False, max_length=255),
+        ),
+        migrations.RunPython(populate_paths, migrations.RunPython.noop),
+    ]
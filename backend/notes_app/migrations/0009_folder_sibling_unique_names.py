@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-18 00:43
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notes_app', '0008_folder_materialized_path'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterUniqueTogether(
+            name='folder',
+            unique_together=set(),
+        ),
+        migrations.AlterField(
+            model_name='folder',
+            name='parent',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.RESTRICT, related_name='children', to='notes_app.folder'),
+        ),
+        migrations.AddConstraint(
+            model_name='folder',
+            constraint=models.UniqueConstraint(fields=('user', 'parent', 'name'), name='unique_folder_name_in_parent'),
+        ),
+        migrations.AddConstraint(
+            model_name='folder',
+            constraint=models.UniqueConstraint(condition=models.Q(('parent__isnull', True)), fields=('user', 'name'), name='unique_root_folder_name'),
+        ),
+    ]
@@ -1,20 +1,76 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Value
+from django.db.models.functions import Concat, Substr
 from django.contrib.auth.models import User
+from django.contrib.postgres.search import SearchVectorField
+from .fields import CompressedTextField
 from django.utils import timezone
 
 
 class Folder(models.Model):
+    """
+    A folder, optionally nested under a parent. `path` is the materialized
+    chain of ids from the root down to this folder (e.g. '/3/17/'), so a
+    whole subtree is one indexed prefix match on it. Names are unique among
+    siblings. Deleting a folder moves its subfolders and notes up to its
+    parent (or the top level) rather than deleting them.
+    """
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='folders')
     name = models.CharField(max_length=255)
+    # RESTRICT: subfolders are moved up by delete(), so a bulk delete never drops a subtree.
+    parent = models.ForeignKey('self', on_delete=models.RESTRICT, null=True, blank=True, related_name='children')
+    path = models.CharField(max_length=255, db_index=True, editable=False, default='')
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
         ordering = ['name']
-        unique_together = ['user', 'name']
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'parent', 'name'], name='unique_folder_name_in_parent'),
+            # NULLs are distinct in the constraint above, so top-level folders need their own.
+            models.UniqueConstraint(
+                fields=['user', 'name'], condition=models.Q(parent__isnull=True), name='unique_root_folder_name'
+            ),
+        ]
 
     def __str__(self):
         return self.name
 
+    def is_in_subtree_of(self, folder):
+        return bool(folder.path) and self.path.startswith(folder.path)
+
+    def save(self, *args, **kwargs):
+        if self.parent_id and self.pk and self.parent.is_in_subtree_of(self):
+            raise ValueError('A folder cannot be moved into its own subtree')
+
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            path = f'{self.parent.path if self.parent_id else "/"}{self.pk}/'
+            if path == self.path:
+                return
+            if self.path:
+                # Moved: rewrite the prefix of this folder and every descendant in one statement.
+                Folder.objects.filter(user_id=self.user_id, path__startswith=self.path).update(
+                    path=Concat(Value(path), Substr('path', len(self.path) + 1))
+                )
+            else:
+                Folder.objects.filter(pk=self.pk).update(path=path)
+            self.path = path
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            children = Folder.objects.filter(parent=self)
+            taken = Folder.objects.filter(user_id=self.user_id, parent_id=self.parent_id).exclude(pk=self.pk)
+            if taken.filter(name__in=children.values('name')).exists():
+                raise ValueError('A subfolder has the same name as a folder it would be moved next to')
+
+            prefix = self.parent.path if self.parent_id else '/'
+            Folder.objects.filter(user_id=self.user_id, path__startswith=self.path).exclude(pk=self.pk).update(
+                path=Concat(Value(prefix), Substr('path', len(self.path) + 1))
+            )
+            children.update(parent_id=self.parent_id)
+            self.notes.update(folder_id=self.parent_id)
+            return super().delete(*args, **kwargs)
+
 
 class Tag(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='tags')
@@ -30,9 +86,12 @@ class Tag(models.Model):
 
 
 class Note(models.Model):
+    PREVIEW_LENGTH = 200
+
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='notes')
     title = models.CharField(max_length=255, blank=True)
-    content = models.TextField(blank=True, default='')
+    content = CompressedTextField(blank=True, default='')
+    preview = models.CharField(max_length=PREVIEW_LENGTH, blank=True, default='', editable=False)
     folder = models.ForeignKey(Folder, on_delete=models.SET_NULL, null=True, blank=True, related_name='notes')
     tags = models.ManyToManyField(Tag, blank=True, related_name='notes')
     color = models.CharField(max_length=7, default='#ffffff')
@@ -42,13 +101,55 @@ class Note(models.Model):
     deleted_at = models.DateTimeField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    version = models.PositiveIntegerField(default=1)
+    search_vector = SearchVectorField(null=True, editable=False)
 
     class Meta:
-        ordering = ['-is_pinned', '-updated_at']
+        ordering = ['-is_pinned', '-updated_at', '-id']
+        indexes = [
+            models.Index(
+                fields=['user', 'is_deleted', '-is_pinned', '-updated_at', '-id'],
+                name='note_list_keyset_idx',
+            ),
+        ]
 
     def __str__(self):
         return self.title or 'Untitled Note'
 
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        # Deferred content, or compressed content never read since loading, is unchanged.
+        if isinstance(self.__dict__.get('content'), str):
+            self.preview = self.content[:self.PREVIEW_LENGTH]
+            if update_fields is not None and 'content' in update_fields:
+                kwargs['update_fields'] = set(update_fields) | {'preview'}
+        super().save(*args, **kwargs)
+        if update_fields is None or {'title', 'content'} & set(update_fields):
+            from .search import index_notes
+            index_notes([self])
+
+
+class NoteRevision(models.Model):
+    """
+    One saved version of a note's content (see notes_app.revisions). The newest
+    revision and periodic snapshots hold the full text; the rest hold a
+    reverse diff against the next newer revision. `data` is zlib-compressed.
+    """
+    note = models.ForeignKey(Note, on_delete=models.CASCADE, related_name='revisions')
+    version = models.PositiveIntegerField()
+    is_full = models.BooleanField(default=True)
+    is_snapshot = models.BooleanField(default=False)
+    data = models.BinaryField()
+    size = models.IntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-version']
+        unique_together = ['note', 'version']
+
+    def __str__(self):
+        return f"{self.note} v{self.version}"
+
 
 class NoteImage(models.Model):
     note = models.ForeignKey(Note, on_delete=models.CASCADE, related_name='images')
@@ -0,0 +1,93 @@
+import base64
+import json
+from datetime import datetime
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class NoteKeysetPagination(BasePagination):
+    """
+    Opt-in keyset pagination over the note list ordering (pinned first, most
+    recently updated next, id as tiebreaker). Each page seeks past the last
+    row of the previous one through note_list_keyset_idx, so deep pages cost
+    the same as the first. Without ?cursor or ?page_size the list is returned
+    unpaginated, as before. Ranked search results page by offset instead.
+    """
+    page_size = 50
+    max_page_size = 200
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    ordering = ('-is_pinned', '-updated_at', '-id')
+
+    def paginate_queryset(self, queryset, request, view=None):
+        params = request.query_params
+        if self.cursor_query_param not in params and self.page_size_query_param not in params:
+            return None
+
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        position = self.decode_cursor(params.get(self.cursor_query_param))
+
+        if queryset.query.order_by:
+            try:
+                offset = max(0, int(position.get('o', 0)))
+            except (TypeError, ValueError):
+                raise NotFound('Invalid cursor')
+            rows = list(queryset[offset:offset + self.page_size + 1])
+            self.next_position = {'o': offset + self.page_size}
+        else:
+            queryset = queryset.order_by(*self.ordering)
+            if position:
+                try:
+                    pinned = bool(position['p'])
+                    updated_at = datetime.fromisoformat(position['u'])
+                    last_id = int(position['i'])
+                except (KeyError, TypeError, ValueError):
+                    raise NotFound('Invalid cursor')
+                queryset = queryset.filter(
+                    Q(is_pinned__lt=pinned)
+                    | Q(is_pinned=pinned, updated_at__lt=updated_at)
+                    | Q(is_pinned=pinned, updated_at=updated_at, id__lt=last_id)
+                )
+            rows = list(queryset[:self.page_size + 1])
+            if rows:
+                last = rows[min(len(rows), self.page_size) - 1]
+                self.next_position = {'p': last.is_pinned, 'u': last.updated_at.isoformat(), 'i': last.id}
+
+        self.has_next = len(rows) > self.page_size
+        return rows[:self.page_size]
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params.get(self.page_size_query_param, self.page_size))
+        except ValueError:
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    def decode_cursor(self, cursor):
+        if not cursor:
+            return {}
+        try:
+            position = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        except (TypeError, ValueError):
+            raise NotFound('Invalid cursor')
+        if not isinstance(position, dict):
+            raise NotFound('Invalid cursor')
+        return position
+
+    def encode_cursor(self, position):
+        return base64.urlsafe_b64encode(json.dumps(position).encode()).decode('ascii')
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        url = replace_query_param(url, self.page_size_query_param, self.page_size)
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.next_position))
+
+    def get_paginated_response(self, data):
+        return Response({'next': self.get_next_link(), 'results': data})
@@ -0,0 +1,109 @@
+"""
+Note revision history. Each content version gets a NoteRevision; the newest
+one is stored in full, and when a newer version arrives it is rewritten as a
+compressed line-based reverse diff against that newer text, except every
+SNAPSHOT_INTERVAL-th revision, which stays a full snapshot. Rebuilding any
+version therefore starts from the nearest newer full revision and applies at
+most SNAPSHOT_INTERVAL diffs.
+"""
+import difflib
+import json
+import zlib
+
+from django.db import transaction
+from django.db.models import Max
+
+from .models import NoteRevision
+
+SNAPSHOT_INTERVAL = 20
+MAX_MATCH_LINES = 2000
+
+
+def compress(text):
+    return zlib.compress(text.encode('utf-8'))
+
+
+def decompress(data):
+    return zlib.decompress(bytes(data)).decode('utf-8')
+
+
+def make_diff(newer, older):
+    """Encode older as line ranges copied from newer plus literal text"""
+    newer_lines = newer.splitlines(keepends=True)
+    older_lines = older.splitlines(keepends=True)
+
+    # Only the changed middle is matched; shared leading and trailing lines are copied whole.
+    head = 0
+    limit = min(len(newer_lines), len(older_lines))
+    while head < limit and newer_lines[head] == older_lines[head]:
+        head += 1
+    tail = 0
+    while tail < limit - head and newer_lines[-1 - tail] == older_lines[-1 - tail]:
+        tail += 1
+    newer_end, older_end = len(newer_lines) - tail, len(older_lines) - tail
+
+    parts = [[0, head]] if head else []
+    if max(newer_end, older_end) - head > MAX_MATCH_LINES:
+        # Matching is quadratic in repeated lines, so a very large change is stored as literal text.
+        parts.append(''.join(older_lines[head:older_end]))
+    else:
+        matcher = difflib.SequenceMatcher(
+            None, newer_lines[head:newer_end], older_lines[head:older_end], autojunk=False
+        )
+        for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+            if tag == 'equal':
+                parts.append([head + i1, head + i2])
+            elif j2 > j1:
+                parts.append(''.join(older_lines[head + j1:head + j2]))
+    if tail:
+        parts.append([newer_end, len(newer_lines)])
+    return zlib.compress(json.dumps(parts, separators=(',', ':')).encode('utf-8'))
+
+
+def apply_diff(data, newer):
+    newer_lines = newer.splitlines(keepends=True)
+    return ''.join(
+        ''.join(newer_lines[part[0]:part[1]]) if isinstance(part, list) else part
+        for part in json.loads(zlib.decompress(bytes(data)))
+    )
+
+
+def record_revision(note):
+    """Store the note's current content as a revision if its version is new"""
+    with transaction.atomic():
+        revisions = NoteRevision.objects.select_for_update().filter(note=note)
+        latest = revisions.order_by('-version').first()
+        if latest and latest.version >= note.version:
+            return
+
+        NoteRevision.objects.create(
+            note=note, version=note.version, is_full=True, is_snapshot=latest is None,
+            data=compress(note.content), size=len(note.content)
+        )
+        if latest is None or latest.is_snapshot:
+            return
+
+        last_snapshot = revisions.filter(is_snapshot=True).aggregate(version=Max('version'))['version'] or 0
+        if revisions.filter(version__gt=last_snapshot, version__lte=latest.version).count() >= SNAPSHOT_INTERVAL:
+            latest.is_snapshot = True
+            latest.save(update_fields=['is_snapshot'])
+        else:
+            latest.data = make_diff(note.content, decompress(latest.data))
+            latest.is_full = False
+            latest.save(update_fields=['data', 'is_full'])
+
+
+def reconstruct(note, version):
+    """Return the note's content at version, or None if that revision is not kept"""
+    full = note.revisions.filter(version__gte=version, is_full=True).order_by('version').first()
+    if full is None:
+        return None
+
+    chain = list(note.revisions.filter(version__gte=version, version__lt=full.version).order_by('-version'))
+    if full.version != version and (not chain or chain[-1].version != version):
+        return None
+
+    content = decompress(full.data)
+    for revision in chain:
+        content = apply_diff(revision.data, content)
+    return content
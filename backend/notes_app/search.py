@@ -0,0 +1,137 @@
+"""
+Full-text search over notes. On Postgres, Note.search_vector holds a weighted
+tsvector (title A, content B) behind a GIN index; on SQLite a FTS5 table keyed
+by note id mirrors title and content. Both are kept in sync on write and give
+ranked results with a highlighted snippet. Other backends fall back to icontains
+on the title and preview.
+
+Note bodies are stored compressed (see notes_app.fields), so vectors and
+Postgres headlines are built from the decompressed text sent as parameters.
+"""
+import re
+
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db import connection
+from django.db.models import F, Q
+from django.db.models.expressions import RawSQL
+
+SEARCH_CONFIG = 'english'
+FTS_TABLE = 'notes_app_note_fts'
+HIGHLIGHT_START = '<mark>'
+HIGHLIGHT_STOP = '</mark>'
+HEADLINE_OPTIONS = f'StartSel={HIGHLIGHT_START}, StopSel={HIGHLIGHT_STOP}, MaxWords=35, MinWords=15'
+INDEX_BATCH_SIZE = 100
+
+
+def search_backend():
+    if connection.vendor == 'postgresql':
+        return 'postgres'
+    if connection.vendor == 'sqlite' and FTS_TABLE in connection.introspection.table_names():
+        return 'fts5'
+    return None
+
+
+def values_table(rows, types):
+    """A VALUES list of rows as SQL and flat params, with each column cast to its type"""
+    row_sql = '({})'.format(', '.join(f'%s::{column_type}' for column_type in types))
+    return ', '.join([row_sql] * len(rows)), [value for row in rows for value in row]
+
+
+def index_notes(notes):
+    """Refresh the search index entries of the given notes"""
+    notes = list(notes)
+    if not notes:
+        return
+
+    backend = search_backend()
+    if backend == 'postgres':
+        from .models import Note
+        table = Note._meta.db_table
+        with connection.cursor() as cursor:
+            for i in range(0, len(notes), INDEX_BATCH_SIZE):
+                batch = notes[i:i + INDEX_BATCH_SIZE]
+                values, params = values_table(
+                    [(note.pk, note.title, note.content) for note in batch], ['bigint', 'text', 'text']
+                )
+                cursor.execute(
+                    f"UPDATE {table} SET search_vector = "
+                    f"setweight(to_tsvector(%s::regconfig, v.title), 'A') || "
+                    f"setweight(to_tsvector(%s::regconfig, v.content), 'B') "
+                    f"FROM (VALUES {values}) AS v (id, title, content) WHERE {table}.id = v.id",
+                    [SEARCH_CONFIG, SEARCH_CONFIG, *params]
+                )
+    elif backend == 'fts5':
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f'INSERT OR REPLACE INTO {FTS_TABLE} (rowid, title, content) VALUES (%s, %s, %s)',
+                [(note.pk, note.title, note.content) for note in notes]
+            )
+
+
+def unindex_notes(note_ids):
+    if note_ids and search_backend() == 'fts5':
+        with connection.cursor() as cursor:
+            cursor.executemany(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [(note_id,) for note_id in note_ids])
+
+
+def fts_query(text):
+    """Quote each word so user input can never be parsed as FTS5 syntax"""
+    return ' '.join('"{}"'.format(word) for word in re.findall(r'\w+', text))
+
+
+def search_notes(queryset, text):
+    """
+    Filter queryset to notes matching text, ranked best first. The FTS5 backend
+    annotates a `snippet`; on Postgres call attach_headlines on the fetched rows.
+    """
+    backend = search_backend()
+
+    if backend == 'postgres':
+        query = SearchQuery(text, search_type='websearch', config=SEARCH_CONFIG)
+        return queryset.filter(search_vector=query).annotate(
+            rank=SearchRank(F('search_vector'), query)
+        ).order_by('-rank', '-updated_at')
+
+    match = fts_query(text)
+    if backend == 'fts5' and match:
+        table = queryset.model._meta.db_table
+        # bm25 is lower for better matches; titles count ten times as much as content.
+        return queryset.filter(
+            id__in=RawSQL(f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s', [match])
+        ).annotate(
+            rank=RawSQL(
+                f'SELECT -bm25({FTS_TABLE}, 10.0, 1.0) FROM {FTS_TABLE} '
+                f'WHERE {FTS_TABLE} MATCH %s AND rowid = {table}.id', [match]
+            ),
+            snippet=RawSQL(
+                f"SELECT snippet({FTS_TABLE}, 1, %s, %s, '…', 24) FROM {FTS_TABLE} "
+                f'WHERE {FTS_TABLE} MATCH %s AND rowid = {table}.id',
+                [HIGHLIGHT_START, HIGHLIGHT_STOP, match]
+            )
+        ).order_by('-rank', '-updated_at')
+
+    return queryset.filter(Q(title__icontains=text) | Q(preview__icontains=text))
+
+
+def attach_headlines(notes, text):
+    """
+    On Postgres, set a highlighted `snippet` of the body on each of the fetched
+    search results, with one query for the bodies and one for the headlines.
+    """
+    notes = list(notes)
+    if not notes or search_backend() != 'postgres':
+        return
+
+    model = type(notes[0])
+    # values_list() skips the field's descriptor, so compressed bodies are inflated here.
+    bodies = model.objects.filter(id__in=[note.id for note in notes]).values_list('id', 'content')
+    values, params = values_table([(pk, str(content)) for pk, content in bodies], ['bigint', 'text'])
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'SELECT v.id, ts_headline(%s::regconfig, v.content, websearch_to_tsquery(%s::regconfig, %s), %s) '
+            f'FROM (VALUES {values}) AS v (id, content)',
+            [SEARCH_CONFIG, SEARCH_CONFIG, text, HEADLINE_OPTIONS, *params]
+        )
+        headlines = dict(cursor.fetchall())
+    for note in notes:
+        note.snippet = headlines.get(note.id)
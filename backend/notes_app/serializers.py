@@ -1,12 +1,33 @@
 from rest_framework import serializers
+from django.db.models import F
 from .models import Folder, Tag, Note, NoteImage
+from .services import BULK_OPERATIONS
 
 
 class FolderSerializer(serializers.ModelSerializer):
     class Meta:
         model = Folder
-        fields = ['id', 'name', 'created_at']
-        read_only_fields = ['id', 'created_at']
+        fields = ['id', 'name', 'parent', 'path', 'created_at']
+        read_only_fields = ['id', 'path', 'created_at']
+
+    def validate_parent(self, parent):
+        if parent is None:
+            return parent
+        if parent.user_id != self.context['request'].user.id:
+            raise serializers.ValidationError('Folder not found.')
+        if self.instance and parent.is_in_subtree_of(self.instance):
+            raise serializers.ValidationError('A folder cannot be moved into its own subtree.')
+        return parent
+
+    def validate(self, attrs):
+        parent = attrs.get('parent', self.instance.parent if self.instance else None)
+        name = attrs.get('name', self.instance.name if self.instance else None)
+        siblings = Folder.objects.filter(user=self.context['request'].user, parent=parent, name=name)
+        if self.instance:
+            siblings = siblings.exclude(pk=self.instance.pk)
+        if siblings.exists():
+            raise serializers.ValidationError({'name': 'A folder with this name already exists here.'})
+        return attrs
 
 
 class TagSerializer(serializers.ModelSerializer):
@@ -38,19 +59,24 @@ class NoteSerializer(serializers.ModelSerializer):
     )
     folder_name = serializers.SerializerMethodField()
     images = NoteImageSerializer(many=True, read_only=True)
+    snippet = serializers.SerializerMethodField()
 
     class Meta:
         model = Note
         fields = [
             'id', 'title', 'content', 'folder', 'folder_name', 'tags', 'tag_ids',
             'color', 'is_pinned', 'is_archived', 'is_deleted', 'deleted_at',
-            'created_at', 'updated_at', 'images'
+            'created_at', 'updated_at', 'images', 'snippet', 'version'
         ]
-        read_only_fields = ['id', 'created_at', 'updated_at']
+        read_only_fields = ['id', 'created_at', 'updated_at', 'version']
 
     def get_folder_name(self, obj):
         return obj.folder.name if obj.folder else None
 
+    def get_snippet(self, obj):
+        """Highlighted match from the content, only present on search results"""
+        return getattr(obj, 'snippet', None)
+
     def create(self, validated_data):
         tag_ids = validated_data.pop('tag_ids', [])
         folder = validated_data.get('folder')
@@ -66,7 +92,62 @@ class NoteSerializer(serializers.ModelSerializer):
         folder = validated_data.get('folder', None)
         if folder == '' or folder is None or folder == 'null':
             validated_data['folder'] = None
+        content_changed = 'content' in validated_data and validated_data['content'] != instance.content
+        if content_changed:
+            instance.version = F('version') + 1
         instance = super().update(instance, validated_data)
+        if content_changed:
+            instance.refresh_from_db(fields=['version'])
         if tag_ids is not None:
             instance.tags.set(tag_ids)
         return instance
+
+
+class NoteDeltaOpSerializer(serializers.Serializer):
+    offset = serializers.IntegerField(min_value=0)
+    delete = serializers.IntegerField(min_value=0, default=0)
+    insert = serializers.CharField(allow_blank=True, trim_whitespace=False, default='')
+
+
+class NoteDeltaSerializer(serializers.Serializer):
+    base_version = serializers.IntegerField(min_value=1)
+    ops = NoteDeltaOpSerializer(many=True, max_length=1000)
+
+
+class NoteBulkSerializer(serializers.Serializer):
+    ids = serializers.ListField(child=serializers.IntegerField(), allow_empty=False, max_length=1000)
+    operation = serializers.ChoiceField(choices=BULK_OPERATIONS)
+    folder = serializers.IntegerField(required=False, allow_null=True)
+    tag_ids = serializers.ListField(child=serializers.IntegerField(), required=False, default=list)
+
+    def validate(self, data):
+        if data['operation'] == 'move' and 'folder' not in data:
+            raise serializers.ValidationError({'folder': 'This field is required to move notes.'})
+        if data['operation'] in ('add_tags', 'remove_tags') and not data['tag_ids']:
+            raise serializers.ValidationError({'tag_ids': 'This field is required to change tags.'})
+        return data
+
+
+class NoteSummarySerializer(serializers.ModelSerializer):
+    """Lightweight list item: no content or images, tags as ids"""
+    folder_name = serializers.SerializerMethodField()
+    tag_ids = serializers.SerializerMethodField()
+    snippet = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Note
+        fields = [
+            'id', 'title', 'snippet', 'folder', 'folder_name', 'tag_ids', 'color',
+            'is_pinned', 'is_archived', 'is_deleted', 'deleted_at', 'created_at', 'updated_at'
+        ]
+        read_only_fields = fields
+
+    def get_folder_name(self, obj):
+        return obj.folder.name if obj.folder else None
+
+    def get_tag_ids(self, obj):
+        return [tag.id for tag in obj.tags.all()]
+
+    def get_snippet(self, obj):
+        # Search results carry a highlighted match; plain lists the opening of the note.
+        return getattr(obj, 'snippet', None) or obj.preview
@@ -0,0 +1,93 @@
+from django.db import transaction
+from django.utils import timezone
+
+from . import counts
+from .models import Folder, Note, NoteImage, Tag
+
+BULK_OPERATIONS = [
+    'move', 'add_tags', 'remove_tags', 'pin', 'unpin', 'archive', 'unarchive', 'trash', 'restore', 'delete'
+]
+
+FLAG_UPDATES = {
+    'pin': {'is_pinned': True},
+    'unpin': {'is_pinned': False},
+    'archive': {'is_archived': True, 'is_pinned': False},
+    'unarchive': {'is_archived': False},
+    'trash': {'is_deleted': True, 'is_pinned': False},
+    'restore': {'is_deleted': False, 'deleted_at': None},
+}
+
+
+def bulk_update_notes(user, note_ids, operation, folder_id=None, tag_ids=()):
+    """
+    Apply one operation to many of the user's notes with set-based statements
+    and return how many notes it touched. Unknown notes, folders or tags raise
+    the model's DoesNotExist.
+    """
+    note_ids = set(note_ids)
+    now = timezone.now()
+
+    with transaction.atomic():
+        notes = Note.objects.filter(user=user, id__in=note_ids)
+        unknown = note_ids - set(notes.values_list('id', flat=True))
+        if unknown:
+            raise Note.DoesNotExist(f'Unknown notes: {sorted(unknown)}')
+
+        if operation == 'move':
+            if folder_id is not None and not Folder.objects.filter(user=user, id=folder_id).exists():
+                raise Folder.DoesNotExist(f'Unknown folder: {folder_id}')
+            notes.update(folder_id=folder_id, updated_at=now)
+
+        elif operation in ('add_tags', 'remove_tags'):
+            tag_ids = set(tag_ids)
+            unknown = tag_ids - set(Tag.objects.filter(user=user, id__in=tag_ids).values_list('id', flat=True))
+            if unknown:
+                raise Tag.DoesNotExist(f'Unknown tags: {sorted(unknown)}')
+
+            through = Note.tags.through
+            if operation == 'add_tags':
+                through.objects.bulk_create(
+                    [through(note_id=note_id, tag_id=tag_id) for note_id in note_ids for tag_id in tag_ids],
+                    ignore_conflicts=True
+                )
+            else:
+                through.objects.filter(note_id__in=note_ids, tag_id__in=tag_ids).delete()
+            notes.update(updated_at=now)
+
+        elif operation == 'delete':
+            purge_notes(note_ids)
+
+        else:
+            updates = dict(FLAG_UPDATES[operation], updated_at=now)
+            if operation == 'trash':
+                updates['deleted_at'] = now
+            notes.update(**updates)
+
+        # update() and through-table writes skip the signals that normally do this.
+        counts.invalidate(user.id)
+
+    return len(note_ids)
+
+
+def purge_notes(note_ids, trashed_before=None):
+    """
+    Permanently delete notes in one short transaction and remove their image
+    files from storage once it commits. Given trashed_before, only notes that
+    are still in the trash since before then are deleted, so a note restored
+    after its id was picked survives. Returns the number of notes deleted.
+    """
+    storage = NoteImage._meta.get_field('image').storage
+
+    def delete_files(names):
+        for name in names:
+            storage.delete(name)
+
+    with transaction.atomic():
+        notes = Note.objects.filter(id__in=note_ids)
+        if trashed_before is not None:
+            notes = notes.filter(is_deleted=True, deleted_at__lt=trashed_before)
+        note_ids = list(notes.select_for_update().values_list('id', flat=True))
+        files = [name for name in NoteImage.objects.filter(note_id__in=note_ids).values_list('image', flat=True) if name]
+        deleted = Note.objects.filter(id__in=note_ids).delete()[1].get(Note._meta.label, 0)
+        transaction.on_commit(lambda: delete_files(files))
+    return deleted
@@ -0,0 +1,26 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from . import counts
+from .models import Folder, Note, Tag
+from .search import unindex_notes
+
+
+@receiver(post_delete, sender=Note)
+def remove_from_search_index(sender, instance, **kwargs):
+    unindex_notes([instance.pk])
+
+
+@receiver(post_save, sender=Note)
+@receiver(post_delete, sender=Note)
+@receiver(post_save, sender=Folder)
+@receiver(post_delete, sender=Folder)
+@receiver(post_delete, sender=Tag)
+def invalidate_counts(sender, instance, **kwargs):
+    counts.invalidate(instance.user_id)
+
+
+@receiver(m2m_changed, sender=Note.tags.through)
+def invalidate_counts_on_tagging(sender, instance, **kwargs):
+    # instance is a Note or, when tagging from the Tag side, a Tag; both belong to one user.
+    counts.invalidate(instance.user_id)
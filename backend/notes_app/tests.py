@@ -1,3 +1,25 @@
-from django.test import TestCase
+import time
 
-# Create your tests here.
+from django.test import SimpleTestCase
+
+from .revisions import apply_diff, make_diff
+
+
+class MakeDiffTests(SimpleTestCase):
+    def test_small_edit_to_large_note_is_cheap(self):
+        # Markdown-like text with many repeated lines, which is the slow case for line matching.
+        lines = [f'## Section {i}\n' if i % 10 == 0 else '\n' if i % 2 else f'- item {i}\n' for i in range(20000)]
+        newer = ''.join(lines)
+        lines[10000] = '- edited item\n'
+        older = ''.join(lines)
+
+        started = time.monotonic()
+        diff = make_diff(newer, older)
+        self.assertLess(time.monotonic() - started, 1)
+        self.assertLess(len(diff), 200)
+        self.assertEqual(apply_diff(diff, newer), older)
+
+    def test_edits_at_both_ends_round_trip(self):
+        newer = ''.join(f'line {i}\n' for i in range(5000))
+        older = 'intro\n' + newer.replace('line 4990\n', 'changed\n')
+        self.assertEqual(apply_diff(make_diff(newer, older), newer), older)
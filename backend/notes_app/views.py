@@ -4,9 +4,19 @@ from rest_framework.response import Response
 from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
 from django.utils import timezone
 from datetime import timedelta
-from django.db.models import Q
+from django.db.models import Exists, F, OuterRef, Prefetch
+from common.search import fuzzy_search
 from .models import Folder, Tag, Note, NoteImage
-from .serializers import FolderSerializer, TagSerializer, NoteSerializer, NoteImageSerializer
+from .serializers import (
+    FolderSerializer, TagSerializer, NoteSerializer, NoteSummarySerializer, NoteDeltaSerializer,
+    NoteBulkSerializer, NoteImageSerializer
+)
+from .deltas import apply_ops
+from .revisions import reconstruct, record_revision
+from .counts import get_counts
+from .services import bulk_update_notes, purge_notes
+from .search import attach_headlines, index_notes, search_notes
+from .pagination import NoteKeysetPagination
 
 
 def create_activity(user, action, description, metadata=None):
@@ -29,6 +39,12 @@ class FolderViewSet(viewsets.ModelViewSet):
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
 
+    def destroy(self, request, *args, **kwargs):
+        try:
+            return super().destroy(request, *args, **kwargs)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
 
 class TagViewSet(viewsets.ModelViewSet):
     serializer_class = TagSerializer
@@ -45,9 +61,27 @@ class NoteViewSet(viewsets.ModelViewSet):
     serializer_class = NoteSerializer
     permission_classes = [permissions.IsAuthenticated]
     parser_classes = [JSONParser, MultiPartParser, FormParser]
+    pagination_class = NoteKeysetPagination
+
+    def is_summary(self):
+        return self.action == 'list' and self.request.query_params.get('view') == 'summary'
+
+    def is_fuzzy(self):
+        return self.request.query_params.get('fuzzy') in ('1', 'true')
+
+    def get_serializer_class(self):
+        if self.is_summary():
+            return NoteSummarySerializer
+        return NoteSerializer
 
     def get_queryset(self):
         queryset = Note.objects.filter(user=self.request.user)
+
+        if self.is_summary():
+            # content never leaves the database; the stored preview stands in for it.
+            queryset = queryset.defer('content', 'search_vector').select_related('folder').prefetch_related(
+                Prefetch('tags', queryset=Tag.objects.only('id'))
+            )
         
         search = self.request.query_params.get('search')
         folder_id = self.request.query_params.get('folder')
@@ -56,15 +90,23 @@ class NoteViewSet(viewsets.ModelViewSet):
         deleted = self.request.query_params.get('deleted')
         
         if search:
-            queryset = queryset.filter(
-                Q(title__icontains=search) | Q(content__icontains=search)
-            )
+            if self.is_fuzzy():
+                queryset = fuzzy_search(queryset, search, ['title'], tags='tags')
+            else:
+                queryset = search_notes(queryset, search)
         
         if folder_id:
-            queryset = queryset.filter(folder_id=folder_id)
+            if self.request.query_params.get('subfolders') == 'true':
+                folder = Folder.objects.filter(user=self.request.user, id=folder_id).first()
+                queryset = queryset.filter(folder__path__startswith=folder.path) if folder else queryset.none()
+            else:
+                queryset = queryset.filter(folder_id=folder_id)
         
         if tag_id:
-            queryset = queryset.filter(tags__id=tag_id)
+            # A subquery rather than a join, so rows never repeat and the list needs no DISTINCT.
+            queryset = queryset.filter(
+                Exists(Note.tags.through.objects.filter(note_id=OuterRef('pk'), tag_id=tag_id))
+            )
         
         if archived == 'true':
             queryset = queryset.filter(is_archived=True, is_deleted=False)
@@ -74,10 +116,25 @@ class NoteViewSet(viewsets.ModelViewSet):
         else:
             queryset = queryset.filter(is_deleted=False)
         
-        return queryset.distinct()
+        return queryset
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+        notes = list(queryset) if page is None else page
+
+        search = request.query_params.get('search')
+        if search and not self.is_fuzzy():
+            attach_headlines(notes, search)
+
+        serializer = self.get_serializer(notes, many=True)
+        if page is not None:
+            return self.get_paginated_response(serializer.data)
+        return Response(serializer.data)
 
     def perform_create(self, serializer):
         note = serializer.save(user=self.request.user)
+        record_revision(note)
         create_activity(
             self.request.user,
             'note_created',
@@ -99,7 +156,84 @@ class NoteViewSet(viewsets.ModelViewSet):
         instance = serializer.instance
         if instance.is_deleted and not serializer.validated_data.get('is_deleted', True):
             instance.deleted_at = None
-        serializer.save()
+        note = serializer.save()
+        record_revision(note)
+
+    @action(detail=False, methods=['post'])
+    def bulk(self, request):
+        serializer = NoteBulkSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+
+        try:
+            count = bulk_update_notes(
+                request.user, data['ids'], data['operation'], data.get('folder'), data['tag_ids']
+            )
+        except (Note.DoesNotExist, Folder.DoesNotExist, Tag.DoesNotExist) as e:
+            return Response({'error': str(e)}, status=status.HTTP_404_NOT_FOUND)
+
+        create_activity(
+            request.user,
+            'notes_bulk_updated',
+            f'{data["operation"].replace("_", " ").capitalize()}: {count} notes',
+            {'operation': data['operation'], 'note_ids': sorted(set(data['ids']))}
+        )
+        return Response({'operation': data['operation'], 'updated': count})
+
+    @action(detail=False, methods=['get'])
+    def counts(self, request):
+        return Response(get_counts(request.user.id))
+
+    @action(detail=True, methods=['patch'])
+    def delta(self, request, pk=None):
+        note = self.get_object()
+        serializer = NoteDeltaSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        base_version = serializer.validated_data['base_version']
+
+        if note.version != base_version:
+            return self.version_conflict(note)
+
+        try:
+            content = apply_ops(note.content, serializer.validated_data['ops'])
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        updated_at = timezone.now()
+        # Only applies if nobody saved the note since it was read above.
+        saved = Note.objects.filter(pk=note.pk, version=base_version).update(
+            content=content, preview=content[:Note.PREVIEW_LENGTH], version=F('version') + 1,
+            updated_at=updated_at
+        )
+        if not saved:
+            note.refresh_from_db()
+            return self.version_conflict(note)
+
+        note.content = content
+        note.version = base_version + 1
+        index_notes([note])
+        record_revision(note)
+        return Response({'id': note.id, 'version': base_version + 1, 'updated_at': updated_at})
+
+    @action(detail=True, methods=['get'])
+    def revisions(self, request, pk=None):
+        note = self.get_object()
+        revisions = note.revisions.values('version', 'size', 'is_snapshot', 'created_at')
+        return Response(list(revisions))
+
+    @action(detail=True, methods=['get'], url_path=r'revisions/(?P<version>\d+)')
+    def revision(self, request, pk=None, version=None):
+        note = self.get_object()
+        content = reconstruct(note, int(version))
+        if content is None:
+            return Response({'error': 'Revision not found'}, status=status.HTTP_404_NOT_FOUND)
+        return Response({'version': int(version), 'content': content})
+
+    def version_conflict(self, note):
+        return Response(
+            {'error': 'Note has changed since base_version', 'version': note.version, 'content': note.content},
+            status=status.HTTP_409_CONFLICT
+        )
 
     @action(detail=True, methods=['patch'])
     def pin(self, request, pk=None):
@@ -173,8 +307,7 @@ class NoteViewSet(viewsets.ModelViewSet):
             is_deleted=True,
             deleted_at__lt=thirty_days_ago
         )
-        count = old_notes.count()
-        old_notes.delete()
+        count = purge_notes(list(old_notes.values_list('id', flat=True)), trashed_before=thirty_days_ago)
         return Response({'deleted': count})
 
 
@@ -56,6 +56,7 @@ class Activity(models.Model):
         ('task_deleted', 'Task Deleted'),
         ('note_created', 'Note Created'),
         ('note_deleted', 'Note Deleted'),
+        ('notes_bulk_updated', 'Notes Bulk Updated'),
     ]
     
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='activities')
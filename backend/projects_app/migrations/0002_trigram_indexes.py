@@ -0,0 +1,35 @@
+from django.db import migrations
+
+TRIGRAM_INDEXES = [
+    ('projects_project_title_trgm_idx', 'projects_app_project', 'title'),
+    ('projects_project_description_trgm_idx', 'projects_app_project', 'description'),
+    ('projects_collection_name_trgm_idx', 'projects_app_collection', 'name'),
+    ('projects_collection_description_trgm_idx', 'projects_app_collection', 'description'),
+    ('projects_tag_name_trgm_idx', 'projects_app_tag', 'name'),
+]
+
+
+def create_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name, table, column in TRIGRAM_INDEXES:
+        schema_editor.execute(f'CREATE INDEX IF NOT EXISTS {name} ON {table} USING GIN ({column} gin_trgm_ops)')
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name, _, _ in TRIGRAM_INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {name}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects_app', '0001_initial'),
+        ('notes_app', '0003_trigram_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
@@ -0,0 +1,22 @@
+from unittest import skipUnless
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+
+from common.search import fuzzy_search
+from projects_app.models import Project
+
+
+@skipUnless(connection.vendor == 'postgresql', 'trigram matching needs pg_trgm')
+class FuzzySearchTests(TestCase):
+    def test_misspelt_word_matches_inside_a_long_description(self):
+        user = User.objects.create(username='fuzzy')
+        description = ' '.join(['Notes on the quarterly planning cycle and its many meetings.'] * 40)
+        project = Project.objects.create(
+            user=user, title='Planning', description=f'{description} Then the kubernetes migration. {description}'
+        )
+        Project.objects.create(user=user, title='Garden', description='Tomatoes and basil.')
+
+        results = fuzzy_search(Project.objects.filter(user=user), 'kubernets', ['title', 'description'])
+        self.assertEqual(list(results), [project])
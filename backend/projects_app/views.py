@@ -2,6 +2,7 @@ from rest_framework import viewsets, permissions, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from django.db.models import Q
+from common.search import fuzzy_search
 from .models import Collection, Tag, Project
 from .serializers import CollectionSerializer, TagSerializer, ProjectSerializer
 
@@ -24,7 +25,10 @@ class CollectionViewSet(viewsets.ModelViewSet):
         queryset = Collection.objects.filter(user=self.request.user)
         search = self.request.query_params.get('search')
         if search:
-            queryset = queryset.filter(Q(name__icontains=search) | Q(description__icontains=search))
+            if self.request.query_params.get('fuzzy') in ('1', 'true'):
+                queryset = fuzzy_search(queryset, search, ['name', 'description'])
+            else:
+                queryset = queryset.filter(Q(name__icontains=search) | Q(description__icontains=search))
         return queryset
 
     def perform_create(self, serializer):
@@ -72,7 +76,10 @@ class ProjectViewSet(viewsets.ModelViewSet):
         pinned = self.request.query_params.get('pinned')
 
         if search:
-            queryset = queryset.filter(Q(title__icontains=search) | Q(description__icontains=search))
+            if self.request.query_params.get('fuzzy') in ('1', 'true'):
+                queryset = fuzzy_search(queryset, search, ['title', 'description'], tags='tags')
+            else:
+                queryset = queryset.filter(Q(title__icontains=search) | Q(description__icontains=search))
         
         if collection_id:
             queryset = queryset.filter(collection_id=collection_id)